@@ -102,7 +102,7 @@ log_message() {
 install_system_deps() {
     log_message "INFO" "Installing system dependencies..." "INSTALL"
     apt-get update
-    apt-get install -y git-lfs alsa-utils python3-pip mpv mpg123
+    apt-get install -y git-lfs alsa-utils libasound2-dev python3-pip mpv mpg123
 }
 
 # Function to install Python requirements
@@ -194,6 +194,11 @@ setup_symlinks() {
         "${KLIPPER_DIR}/klippy/extras/sound_system.py"
     ln -sf "${SOUND_DIR}/components/sound_system_service.py" \
         "${MOONRAKER_DIR}/moonraker/components/sound_system_service.py"
+    # Sound manifest module, imported by both of the above
+    ln -sf "${SOUND_DIR}/extras/sound_manifest.py" \
+        "${KLIPPER_DIR}/klippy/extras/sound_manifest.py"
+    ln -sf "${SOUND_DIR}/extras/sound_manifest.py" \
+        "${MOONRAKER_DIR}/moonraker/components/sound_manifest.py"
         
     # Z Force Move link
     ln -sf "${LISTER_CONFIG_DIR}/extras/z_force_move.py" \
@@ -449,6 +454,14 @@ verify_sound_setup() {
         log_message "ERROR" "Moonraker sound symlink points to wrong target: $moonraker_target" "INSTALL"
         return 1
     fi
+
+    for manifest_link in "${KLIPPER_DIR}/klippy/extras/sound_manifest.py" \
+            "${MOONRAKER_DIR}/moonraker/components/sound_manifest.py"; do
+        if [ "$(readlink -f "$manifest_link")" != "${SOUND_DIR}/extras/sound_manifest.py" ]; then
+            log_message "ERROR" "Sound manifest not linked: $manifest_link" "INSTALL"
+            return 1
+        fi
+    done
     
     # Test audio system
     if ! amixer sget 'PCM' &> /dev/null; then
@@ -473,6 +486,11 @@ setup_sound_system() {
         "${KLIPPER_DIR}/klippy/extras/sound_system.py"
     ln -sf "${SOUND_DIR}/components/sound_system_service.py" \
         "${MOONRAKER_DIR}/moonraker/components/sound_system_service.py"
+    # Sound manifest module, imported by both of the above
+    ln -sf "${SOUND_DIR}/extras/sound_manifest.py" \
+        "${KLIPPER_DIR}/klippy/extras/sound_manifest.py"
+    ln -sf "${SOUND_DIR}/extras/sound_manifest.py" \
+        "${MOONRAKER_DIR}/moonraker/components/sound_manifest.py"
     
     # Set permissions
     chown -R pi:pi "$SOUND_FILES_DIR"
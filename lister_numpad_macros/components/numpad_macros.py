@@ -1,9 +1,11 @@
 from __future__ import annotations
 import logging
+import os
 import time
-from typing import TYPE_CHECKING, Dict, Any, Optional, Set as SetType
+from typing import TYPE_CHECKING, Deque, Dict, Any, List, Optional, Set as SetType, Tuple
 import re
-import subprocess
+from collections import deque
+from contextvars import ContextVar
 
 import asyncio
 
@@ -17,6 +19,73 @@ if TYPE_CHECKING:
     from moonraker.components.klippy_apis import KlippyAPI
     from moonraker.confighelper import ConfigHelper
 
+# G-code collected while handling a single numpad event.  Kept per task so
+# concurrent events never mix their scripts.
+_gcode_batch: ContextVar[Optional[List[str]]] = ContextVar('_gcode_batch', default=None)
+
+# Stage timings of the numpad event being handled, see _finish_event_timing
+_event_timing: ContextVar[Optional[Dict[str, Any]]] = ContextVar('_event_timing', default=None)
+
+# Printer objects kept up to date through a Klippy subscription
+SUBSCRIBED_OBJECTS: Dict[str, Optional[List[str]]] = {
+    'print_stats': ['state'],
+    'toolhead': ['position'],
+    'gcode_move': ['speed_factor'],
+    'save_variables': ['variables'],
+    'gcode_macro CHECK_PROBE_STATUS': ['monitor_active'],
+}
+
+# Seconds a speed or Z target sent by the knob is preferred over the snapshot,
+# Klippy pushes subscription updates less often than knob windows are flushed
+KNOB_TARGET_HOLD = 1.0
+
+class LatencyHistogram:
+    """Fixed-size latency histogram with log spaced buckets (milliseconds)"""
+    # Bucket upper bounds from 0.5 ms growing by 1.25x up to roughly 100 s
+    BOUNDS: List[float] = [0.5 * 1.25 ** i for i in range(56)]
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(self.BOUNDS) + 1)
+        self.count: int = 0
+        self.total: float = 0.
+        self.max: float = 0.
+
+    def add(self, value_ms: float) -> None:
+        idx = 0
+        while idx < len(self.BOUNDS) and value_ms > self.BOUNDS[idx]:
+            idx += 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, pct: float) -> float:
+        """Estimate a percentile, interpolating linearly within its bucket"""
+        if not self.count:
+            return 0.
+        target = self.count * pct / 100.
+        seen = 0
+        for idx, cnt in enumerate(self.counts):
+            if cnt and seen + cnt >= target:
+                lower = self.BOUNDS[idx - 1] if idx else 0.
+                upper = self.BOUNDS[idx] if idx < len(self.BOUNDS) else self.max
+                upper = min(upper, self.max)
+                if lower >= upper:
+                    return upper
+                return lower + (upper - lower) * (target - seen) / cnt
+            seen += cnt
+        return self.max
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 2) if self.count else 0.,
+            'max': round(self.max, 2),
+            'p50': round(self.percentile(50), 2),
+            'p95': round(self.percentile(95), 2),
+            'p99': round(self.percentile(99), 2)
+        }
+
 class NumpadMacros:
     def __init__(self, config: ConfigHelper) -> None:
         self.server = config.get_server()
@@ -81,14 +150,37 @@ class NumpadMacros:
         self.no_confirm_keys: SetType[str] = set(k.strip() for k in no_confirm_str.split(','))
         self.confirmation_keys: SetType[str] = set(k.strip() for k in confirm_str.split(','))
 
+        # Keys that trigger Klippy's emergency stop directly, bypassing
+        # confirmation, query macros and the G-code queue
+        immediate_str = config.get('immediate_keys', 'key_dot')
+        self.immediate_keys: SetType[str] = set(
+            k.strip() for k in immediate_str.split(',') if k.strip()
+        )
+
+        # Keys whose G-code must run on its own instead of being batched
+        # into a single script per event
+        batch_exclude_str = config.get('batch_exclude_keys', 'key_dot')
+        self.batch_exclude_keys: SetType[str] = set(
+            k.strip() for k in batch_exclude_str.split(',') if k.strip()
+        )
+
         if self.debug_log:
             self.logger.debug(f"No confirmation required for keys: {self.no_confirm_keys}")
             self.logger.debug(f"Confirmation keys: {self.confirmation_keys}")
+            self.logger.debug(f"Batching disabled for keys: {self.batch_exclude_keys}")
+            self.logger.debug(f"Immediate emergency stop keys: {self.immediate_keys}")
 
         # Get command mappings from config
         self.command_mapping: Dict[str,str] = {}
         self.initial_query_command_mapping: Dict[str, str] = {}
         self._load_command_mapping(config)
+        for key in sorted(self.immediate_keys):
+            # The immediate path always runs Klippy's emergency stop
+            cmd = config.get(key, None) if config.has_option(key) else None
+            if cmd and cmd.strip().upper() != 'M112':
+                self.logger.warning(
+                    f"{key} is an immediate emergency stop key, its command '{cmd}' is ignored"
+                )
 
         # State tracking
         self.pending_key: Optional[str] = None
@@ -103,9 +195,77 @@ class NumpadMacros:
         self._pending_z_offset_save = False
         self._last_z_adjust_time = 0.0
         self._accumulated_z_adjust = 0.0
-        
-        # Add tracking for loaded finetune value
+
+        # Knob ticks arriving within this window are sent as one adjustment
+        self.knob_coalesce_window = config.getfloat(
+            'knob_coalesce_window', 0.15, minval=0., maxval=2.
+        )
+        # Upper bound on the acceleration rate sent by the service for a fast spin
+        self.knob_max_rate = config.getfloat('knob_max_rate', 10., minval=1.)
+        self._knob_pending_kind: Optional[str] = None
+        self._knob_pending_ticks: int = 0
+        self._knob_pending_steps: float = 0.
+        self._knob_flush_handle: Optional[asyncio.TimerHandle] = None
+        # Last speed and coarse probe Z sent by the knob: kind -> (value, time sent)
+        self._knob_targets: Dict[str, Tuple[float, float]] = {}
+
+        # Add tracking for loaded finetune value, authoritative once loaded
         self._current_finetune_nozzle_offset = 0.0
+        self._z_offset_save_handle: Optional[asyncio.TimerHandle] = None
+        self._z_offset_save_lock = asyncio.Lock()
+
+        # Snapshot of the subscribed printer objects, updated from Klippy
+        # status notifications so the knob path needs no queries
+        self._printer_state: Dict[str, Dict[str, Any]] = {}
+        self._state_subscribed: bool = False
+
+        # Latency histograms per stage, grouped by key and by handling mode
+        self._key_latency: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._mode_latency: Dict[str, Dict[str, LatencyHistogram]] = {}
+
+        # Supervision of numpad_event_service, restarted only when failed or stale
+        self.service_name = config.get('service_name', 'numpad_event_service')
+        self.service_check_interval = config.getfloat(
+            'service_check_interval', 60., above=1.
+        )
+        self.service_stale_timeout = config.getfloat(
+            'service_stale_timeout', 180., above=0.
+        )
+        self._service_state: str = 'unknown'
+        self._service_last_seen: float = time.monotonic()
+        self._service_restarts: int = 0
+        self._service_restart_duration: Optional[float] = None
+        self._service_restarting: bool = False
+        # Restarts the service has not checked in after, each one doubles the
+        # wait before the next and supervision gives up at the cap
+        self.service_max_restarts = config.getint('service_max_restarts', 5, minval=1)
+        self._service_failed_restarts: int = 0
+        self._service_next_restart: float = 0.
+        # Delivery queue counters reported by the service with each heartbeat
+        self._service_queue: Dict[str, Any] = {}
+        self._service_timer = self.event_loop.register_timer(self._check_service_health)
+
+        # Versioned status, notifications only carry the fields that changed
+        self._status_version: int = 0
+        self._last_status: Dict[str, Any] = self._get_dynamic_status()
+        self._status_changes: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=50)
+
+        # Ring buffer of structured trace events, formatted only when dumped.
+        # Off by default, it keeps every event and a copy of every batched script
+        self.trace_size = config.getint('trace_size', 0, minval=0)
+        data_path = self.server.get_app_args().get('data_path', '~/printer_data')
+        self.trace_file = os.path.expanduser(config.get(
+            'trace_file', os.path.join(data_path, 'logs', 'numpad_trace.log')
+        ))
+        self._trace_buffer: Deque[Tuple[float, str, Dict[str, Any]]] = deque(
+            maxlen=self.trace_size
+        )
+
+        # Confirmed commands run as background jobs
+        self.job_history_size = config.getint('job_history_size', 20, minval=1)
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+        self._job_tasks: Dict[int, asyncio.Task] = {}
+        self._next_job_id: int = 1
 
         # Register endpoints
         self.server.register_endpoint(
@@ -114,11 +274,28 @@ class NumpadMacros:
         self.server.register_endpoint(
             "/server/numpad/status", ['GET'], self._handle_status_request
         )
+        self.server.register_endpoint(
+            "/server/numpad/metrics", ['GET'], self._handle_metrics_request
+        )
+        self.server.register_endpoint(
+            "/server/numpad/jobs", ['GET'], self._handle_jobs_request
+        )
+        self.server.register_endpoint(
+            "/server/numpad/heartbeat", ['POST'], self._handle_heartbeat
+        )
+        self.server.register_endpoint(
+            "/server/numpad/trace", ['GET'], self._handle_trace_request
+        )
 
         # Register notifications
         self.server.register_notification('numpad_macros:status_update')
+        self.server.register_notification('numpad_macros:config_update')
         self.server.register_notification('numpad_macros:command_queued')
         self.server.register_notification('numpad_macros:command_executed')
+        self.server.register_notification('numpad_macros:job_queued')
+        self.server.register_notification('numpad_macros:job_started')
+        self.server.register_notification('numpad_macros:job_completed')
+        self.server.register_notification('numpad_macros:job_failed')
 
         # Register event handlers
         self.server.register_event_handler(
@@ -127,6 +304,9 @@ class NumpadMacros:
         self.server.register_event_handler(
             "server:klippy_shutdown", self._handle_shutdown
         )
+        self.server.register_event_handler(
+            "server:klippy_disconnect", self._handle_disconnect
+        )
 
         if self.debug_log:
             self.logger.debug(f"{self.name}: Component Initialized")
@@ -163,41 +343,76 @@ class NumpadMacros:
                 self.initial_query_command_mapping[key] = f'_NO_ASSIGNED_MACRO KEY={key}'
 
     async def _handle_numpad_event(self, web_request: WebRequest) -> Dict[str, Any]:
+        received = time.monotonic()
+        self._mark_service_seen()
+        event = web_request.get_args()
+        key: str = event.get('key', '')
+
+        # The service stamps each event with its wall clock capture time
+        timing: Dict[str, Any] = {
+            'key': key, 'mode': None, 'received': received, 'stages': []
+        }
+        try:
+            timing['transport'] = max(0., (time.time() - float(event['time'])) * 1000.)
+        except (KeyError, TypeError, ValueError):
+            pass
+        timing_token = _event_timing.set(timing)
+
+        # Collect all G-code produced by this event and send it to Klippy
+        # as one script, unless the key or the event opts out
+        batch = key not in self.batch_exclude_keys and bool(event.get('batch', True))
+        token = _gcode_batch.set([] if batch else None)
+        try:
+            return await self._process_numpad_event(event)
+        finally:
+            # Also flushes error responses queued before an exception
+            try:
+                await self._flush_gcode_batch()
+            finally:
+                _gcode_batch.reset(token)
+                _event_timing.reset(timing_token)
+                self._finish_event_timing(timing)
+
+    async def _process_numpad_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            event = web_request.get_args()
             key: str = event.get('key', '')
             event_type: str = event.get('event_type', '')
 
-            if self.debug_log:
-                self.logger.debug(f"Received event - Key: {key}, Type: {event_type}")
-                self.logger.debug(f"Current state - pending_key: {self.pending_key}, "
-                                  f"pending_command: {self.pending_command}")
+            self._trace('event_received', key=key, event_type=event_type,
+                        pending_key=self.pending_key, pending_command=self.pending_command)
+
+            # EMERGENCY STOP, NOTHING MAY DELAY THIS
+            if key in self.immediate_keys:
+                self._set_event_mode('immediate')
+                await self._handle_immediate_key(key)
+                return {'status': 'emergency_stop'}
 
             # THE MOST 1ST ORDER IMPORTANT KEY
             # First, check if it's a confirmation key
             if key in self.confirmation_keys:
-                if self.debug_log:
-                    self.logger.debug("Processing confirmation key")
-                await self._handle_confirmation()
-                return {'status': 'confirmed'}
+                self._set_event_mode('confirm')
+                job_id = await self._handle_confirmation()
+                return {'status': 'confirmed', 'job_id': job_id}
 
             # THESE COMMAND RUN DIRECTLY AND 2ND ORDER
             # Then check if it's a no-confirmation key
             if key in self.no_confirm_keys:
-                if self.debug_log:
-                    self.logger.debug(f"Processing no-confirmation key: {key}")
 
                 # Handle adjustment keys specially
                 # Check if we are dealing with up and down, they are special 3RD ORDER
                 if key in ['key_up', 'key_down']:
-                    await self._handle_knob_adjustment(key)
+                    # The service merges knob ticks that queued up while sending
+                    # and sends how fast the knob is spinning as a step rate
+                    ticks = max(1, int(event.get('ticks', 1)))
+                    rate = min(max(float(event.get('rate', 1.)), 1.), self.knob_max_rate)
+                    await self._handle_knob_adjustment(key, ticks, rate)
                 else:
+                    self._set_event_mode('direct')
                     # Now we can run the query command directly because
                     # we are dealing with real command as is no confirmation key.
                     # Execute command directly without query prefix
                     command = self.command_mapping[key]
-                    if self.debug_log:
-                        self.logger.debug(f"Executing no-confirmation command: {command}")
+                    self._trace('direct_command', key=key, command=command)
 
                     await self._execute_gcode(f'RESPOND MSG="Numpad macros: Executing {command}"')
                     await self._execute_gcode(command)
@@ -212,9 +427,7 @@ class NumpadMacros:
                 return {'status': 'executed'}
 
             # Finally, handle regular command keys that need confirmation
-            if self.debug_log:
-                self.logger.debug("Processing regular command key")
-
+            self._set_event_mode('query')
             await self._handle_command_key(key)
             return {'status': 'queued'}
 
@@ -222,10 +435,28 @@ class NumpadMacros:
             self.logger.exception("Error processing numpad event")
             raise
 
+    async def _handle_immediate_key(self, key: str) -> None:
+        """Trigger an emergency stop through Klippy's API, skipping the G-code queue"""
+        self.logger.warning(f"Emergency stop requested by numpad key {key}")
+        kapis: KlippyAPI = self.server.lookup_component('klippy_apis')
+        start = time.monotonic()
+        try:
+            await kapis.emergency_stop()
+        finally:
+            self._note_event_stage('emergency_stop', start)
+
+        # Anything pending is meaningless once the printer is stopped
+        self.pending_key = None
+        self.pending_command = None
+        await self.server.send_event(
+            "numpad_macros:command_executed",
+            {'command': 'M112'}
+        )
+        self._notify_status_update()
+
     async def _handle_command_key(self, key: str) -> None:
         """Handle regular command keys that require confirmation"""
-        if self.debug_log:
-            self.logger.debug(f"Processing command key: {key}")
+        self._trace('command_key', key=key, replaces=self.pending_key)
 
         # Store as pending command (replaces any existing pending command)
         if self.pending_key and self.pending_key != key:
@@ -253,28 +484,81 @@ class NumpadMacros:
             {'command': self.pending_command}
         )
 
-    async def _handle_confirmation(self) -> None:
-        """Handle confirmation key press"""
-        if self.debug_log:
-            self.logger.debug(f"Handling confirmation with state - pending_key: {self.pending_key}, "
-                            f"pending_command: {self.pending_command}")
-
+    async def _handle_confirmation(self) -> Optional[int]:
+        """Handle confirmation key press, returns the id of the started job"""
         if not self.pending_key or not self.pending_command:
-            if self.debug_log:
-                self.logger.debug("No pending command to confirm")
+            self._trace('confirm_nothing_pending')
             await self._execute_gcode('RESPOND MSG="Numpad macros: No command pending for confirmation"')
-            return
+            return None
+
+        # Store command locally before clearing state
+        key = self.pending_key
+        cmd = self.pending_command
+
+        # Run the command as a background job so long macros don't hold
+        # the request open and new keys are accepted meanwhile
+        job = self._create_job(key, cmd)
 
+        # Clear pending command state
+        self.pending_key = None
+        self.pending_command = None
+        self._trace('job_queued', job_id=job['job_id'], key=key, command=cmd)
+        self._notify_status_update()
+        return job['job_id']
+
+    def _create_job(self, key: str, cmd: str) -> Dict[str, Any]:
+        """Create a job for a confirmed command and start it in the background"""
+        job_id = self._next_job_id
+        self._next_job_id += 1
+        job: Dict[str, Any] = {
+            'job_id': job_id,
+            'key': key,
+            'command': cmd,
+            'state': 'queued',
+            'queued_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None
+        }
+        self._jobs[job_id] = job
+
+        # Forget the oldest finished jobs
+        while len(self._jobs) > self.job_history_size:
+            oldest = next(
+                (jid for jid, j in self._jobs.items() if j['state'] in ('completed', 'failed')),
+                None
+            )
+            if oldest is None:
+                break
+            del self._jobs[oldest]
+
+        self.server.send_event("numpad_macros:job_queued", dict(job))
+        self._job_tasks[job_id] = self.event_loop.create_task(self._run_job(job))
+        return job
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        """Execute a confirmed command and report its progress"""
+        cmd = job['command']
+        # Jobs get their own batch and timing, not those of the confirming event
+        batch_token = _gcode_batch.set([])
+        timing: Dict[str, Any] = {
+            'key': job['key'], 'mode': 'job', 'received': time.monotonic(), 'stages': []
+        }
+        timing_token = _event_timing.set(timing)
         try:
-            # Store command locally before clearing state
-            cmd = self.pending_command
-            if self.debug_log:
-                self.logger.debug(f"Executing confirmed command: {cmd}")
+            job['state'] = 'running'
+            job['started_at'] = time.time()
+            self.server.send_event("numpad_macros:job_started", dict(job))
+            self._trace('job_started', job_id=job['job_id'], command=cmd)
 
             # Execute the command
             await self._execute_gcode(f'RESPOND MSG="Numpad macros: Executing confirmed command {cmd}"')
-
             await self._execute_gcode(cmd)
+            await self._flush_gcode_batch()
+
+            job['state'] = 'completed'
+            job['finished_at'] = time.time()
+            self.server.send_event("numpad_macros:job_completed", dict(job))
 
             # Notify of execution
             await self.server.send_event(
@@ -282,134 +566,91 @@ class NumpadMacros:
                 {'command': cmd}
             )
 
+        except asyncio.CancelledError:
+            job['state'] = 'failed'
+            job['error'] = "Cancelled"
+            job['finished_at'] = time.time()
+            self.server.send_event("numpad_macros:job_failed", dict(job))
+            raise
         except Exception as e:
+            job['state'] = 'failed'
+            job['error'] = str(e)
+            job['finished_at'] = time.time()
+            self.server.send_event("numpad_macros:job_failed", dict(job))
             self.logger.exception(f"Error executing command: {str(e)}")
-            await self._execute_gcode(f'RESPOND TYPE=error MSG="Numpad macros: Error executing command: {str(e)}"')
+            try:
+                await self._execute_gcode(
+                    f'RESPOND TYPE=error MSG="Numpad macros: Error executing command: {str(e)}"',
+                    immediate=True
+                )
+            except Exception:
+                pass
         finally:
-            # Clear pending command state
-            self.pending_key = None
-            self.pending_command = None
-            if self.debug_log:
-                self.logger.debug("Cleared pending command state")
-            self._notify_status_update()
+            _gcode_batch.reset(batch_token)
+            _event_timing.reset(timing_token)
+            self._finish_event_timing(timing)
+            self._job_tasks.pop(job['job_id'], None)
+
+    async def _handle_jobs_request(
+            self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        """Handle jobs request endpoint"""
+        job_id = web_request.get_int('job_id', None)
+        if job_id is not None:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise self.server.error(f"Job {job_id} not found", 404)
+            return {'job': job}
+        return {'jobs': list(self._jobs.values())}
 
     # The updated _handle_adjustment method:
-    async def _handle_knob_adjustment(self, key: str) -> None:
+    async def _handle_knob_adjustment(self, key: str, ticks: int = 1, rate: float = 1.) -> None:
         """Handle immediate adjustment commands (up/down keys)"""
         try:
-            if self.debug_log:
-                self.logger.debug(f"Starting adjustment handling - Key: {key}")
-
             await self._check_klippy_state()
-            if self.debug_log:
-                self.logger.debug(
-                    f"Klippy state checked - is_probing: {self.is_probing}, is_printing: {self._is_printing}"
-                )
 
-            # Initialize cmd as None
-            cmd = None
+            direction = 1 if key == 'key_up' else -1
+            switched_to_fine = False
 
             if self.is_probing:
-                # Get current Z position
-                toolhead = await self._get_toolhead_position()
-                current_z = toolhead['z']
-
-                if self.debug_log:
-                    self.logger.debug(f"Probe adjustment - Current Z: {current_z}")
-
                 if key == 'key_down' and not self.is_fine_tuning:
-                    self.quick_jumps_count += 1
+                    self.quick_jumps_count += ticks
                     if self.quick_jumps_count > self.quick_jumps_limit:
                         self.is_fine_tuning = True
-                        await self._execute_gcode('RESPOND MSG="Switched to fine tuning mode"')
-
-                if self.is_fine_tuning:
-                    # Fine tuning mode
-                    if key == 'key_up':
-                        await self._execute_gcode('_FURTHER_KNOB_PROBE_MICRO_CALIBRATE')
-                        cmd = "TESTZ Z=+"
-                    else:
-                        await self._execute_gcode('_NEARER_KNOB_PROBE_MICRO_CALIBRATE')
-                        cmd = "TESTZ Z=-"
-                else:
-                    # Coarse adjustment mode
-                    step_size = max(current_z * self.probe_coarse_multiplier, self.probe_min_step)
-                    if key == 'key_up':
-                        await self._execute_gcode('_FURTHER_KNOB_PROBE_CALIBRATE')
-                        cmd = f"TESTZ Z=+{step_size:.3f}"
-                    else:
-                        await self._execute_gcode('_NEARER_KNOB_PROBE_CALIBRATE')
-                        cmd = f"TESTZ Z=-{step_size:.3f}"
+                        switched_to_fine = True
+
+                kind = 'probe_fine' if self.is_fine_tuning else 'probe_coarse'
+                # Moves towards the bed are not accelerated, a scaled step could overshoot
+                if direction < 0:
+                    rate = 1.
 
             elif self._is_printing:
                 # Get Z height to determine mode
                 toolhead = await self._get_toolhead_position()
                 current_z = toolhead['z']
 
-                if self.debug_log:
-                    self.logger.debug(f"Print adjustment - Current Z: {current_z}")
+                self._trace('print_adjustment', key=key, z=current_z)
 
                 if current_z <= 1.0:
                     # Z offset adjustment during print
-                    if key == 'key_up':
-                        cmd = f"SET_GCODE_OFFSET Z_ADJUST={self.z_adjust_increment} MOVE=1"
-                        adjustment = self.z_adjust_increment
-                        await self._execute_gcode('_FURTHER_KNOB_FIRST_LAYER')
-                    else:
-                        cmd = f"SET_GCODE_OFFSET Z_ADJUST=-{self.z_adjust_increment} MOVE=1"
-                        adjustment = -self.z_adjust_increment
-                        await self._execute_gcode('_NEARER_KNOB_FIRST_LAYER')
-
-                    # Track the adjustment
-                    self._accumulated_z_adjust += adjustment
-                    self._pending_z_offset_save = True
-                    self._last_z_adjust_time = time.time()
-                    
-                    # Start the delayed save
-                    asyncio.create_task(self._delayed_save_z_offset())
-
+                    kind = 'z_offset'
+                    # Same for bringing the nozzle nearer during the first layer
+                    if direction < 0:
+                        rate = 1.
                 else:
                     # Speed adjustment using M220
-                    # Get current speed factor
-                    kapis: KlippyAPI = self.server.lookup_component('klippy_apis')
-                    result = await kapis.query_objects({'gcode_move': None})
-                    current_speed = result.get('gcode_move', {}).get('speed_factor', 1.0) * 100
-
-                    increment = self.speed_settings["increment"]
-                    max_speed = self.speed_settings["max"]
-                    min_speed = self.speed_settings["min"]
-
-                    # Calculate new speed value
-                    if key == 'key_up':
-                        new_speed = min(current_speed + increment, max_speed)
-                        await self._execute_gcode('_INCREASE_KNOB_SPEED')  # Sound for speed up
-                    else:
-                        new_speed = max(current_speed - increment, min_speed)
-                        await self._execute_gcode('_DEACREASE_KNOB_SPEED')  # Sound for speed down
-
-                    cmd = f"M220 S{int(new_speed)}"
+                    kind = 'speed'
 
             else:
                 # Standby mode: Volume control
-                if key == 'key_up':
-                    await self._execute_gcode('_INCREASE_KNOB_VOLUME')  # Sound for volume up
-                    await self._execute_gcode('VOLUME_UP')
-                else:
-                    await self._execute_gcode('_DEACREASE_KNOB_VOLUME')  # Sound for volume down
-                    await self._execute_gcode('VOLUME_DOWN')
+                kind = 'volume'
 
-                if self.debug_log:
-                    self.logger.debug("No adjustment command was generated")
+            self._set_event_mode(kind)
+            self._trace('knob_tick', key=key, mode=kind, ticks=ticks, rate=rate)
+            await self._queue_knob_tick(kind, direction * ticks, rate)
 
-            # Execute the command only if one was set
-            if cmd is not None:
-                if self.debug_log:
-                    self.logger.debug(f"Executing adjustment command: {cmd}")
-                await self._execute_gcode(f'RESPOND MSG="Numpad macros: {cmd}"')
-                await self._execute_gcode(cmd)
-            else:
-                if self.debug_log:
-                    self.logger.debug("No adjustment command was generated")
+            if switched_to_fine:
+                await self._execute_gcode('RESPOND MSG="Switched to fine tuning mode"')
 
         except Exception as e:
             msg = f"Error handling adjustment: {str(e)}"
@@ -417,18 +658,222 @@ class NumpadMacros:
             await self._execute_gcode(f'RESPOND TYPE=error MSG="Numpad macros: {msg}"')
             raise
 
-    async def _check_klippy_state(self) -> None:
-        """Update internal state based on Klippy status"""
+    async def _queue_knob_tick(self, kind: str, ticks: int, rate: float = 1.) -> None:
+        """Add knob ticks to the coalescing window, flushing on a mode change"""
+        if self._knob_pending_kind is not None and self._knob_pending_kind != kind:
+            await self._flush_knob_ticks()
+
+        self._knob_pending_kind = kind
+        self._knob_pending_ticks += ticks
+        self._knob_pending_steps += ticks * rate
+
+        if self.knob_coalesce_window <= 0.:
+            await self._flush_knob_ticks()
+        elif self._knob_flush_handle is None:
+            self._knob_flush_handle = self.event_loop.delay_callback(
+                self.knob_coalesce_window, self._handle_knob_window_expired
+            )
+
+    async def _handle_knob_window_expired(self) -> None:
+        """Send the ticks collected during the coalescing window as one script"""
+        self._knob_flush_handle = None
+        token = _gcode_batch.set([])
+        # Dispatch time of the window is recorded against its mode only
+        timing: Dict[str, Any] = {
+            'key': None, 'mode': self._knob_pending_kind,
+            'received': None, 'stages': []
+        }
+        timing_token = _event_timing.set(timing)
+        try:
+            await self._flush_knob_ticks()
+            await self._flush_gcode_batch()
+        except Exception as e:
+            msg = f"Error handling adjustment: {str(e)}"
+            self.logger.exception(msg)
+            await self._execute_gcode(f'RESPOND TYPE=error MSG="Numpad macros: {msg}"', immediate=True)
+        finally:
+            _gcode_batch.reset(token)
+            _event_timing.reset(timing_token)
+            self._finish_event_timing(timing)
+
+    async def _flush_knob_ticks(self) -> None:
+        """Turn the pending knob ticks into one net adjustment and one feedback sound"""
+        if self._knob_flush_handle is not None:
+            self._knob_flush_handle.cancel()
+            self._knob_flush_handle = None
+
+        kind = self._knob_pending_kind
+        ticks = self._knob_pending_ticks
+        # Ticks scaled by the spin rate, a slow turn gives steps == ticks
+        steps = self._knob_pending_steps
+        self._knob_pending_kind = None
+        self._knob_pending_ticks = 0
+        self._knob_pending_steps = 0.
+
+        # Fine probing moves one bisection per tick, everything else follows the scaled steps
+        net = ticks if kind == 'probe_fine' else steps
+        if kind is None or net == 0:
+            return
+
+        up = net > 0
+        count = max(1, abs(ticks))
+        cmds: List[str] = []
+
+        self._trace('knob_flush', mode=kind, ticks=ticks, steps=steps)
+
+        if kind == 'probe_fine':
+            # TESTZ Z=+/- bisects, so the moves cannot be summed
+            if up:
+                await self._execute_gcode('_FURTHER_KNOB_PROBE_MICRO_CALIBRATE')
+                cmds = ["TESTZ Z=+"] * count
+            else:
+                await self._execute_gcode('_NEARER_KNOB_PROBE_MICRO_CALIBRATE')
+                cmds = ["TESTZ Z=-"] * count
+
+        elif kind == 'probe_coarse':
+            # Coarse adjustment mode, each tick steps relative to the height it reaches
+            toolhead = await self._get_toolhead_position()
+            current_z = self._get_knob_base('probe_coarse', toolhead['z'], .002)
+            self._trace('probe_adjustment', z=current_z)
+
+            # Downward ticks are queued unscaled, see _handle_knob_adjustment
+            rate = abs(steps) / count if up else 1.
+            total = 0.
+            for _ in range(count):
+                step_size = max(current_z * self.probe_coarse_multiplier, self.probe_min_step) * rate
+                current_z += step_size if up else -step_size
+                total += step_size
+
+            if up:
+                await self._execute_gcode('_FURTHER_KNOB_PROBE_CALIBRATE')
+                cmds = [f"TESTZ Z=+{total:.3f}"]
+            else:
+                await self._execute_gcode('_NEARER_KNOB_PROBE_CALIBRATE')
+                cmds = [f"TESTZ Z=-{total:.3f}"]
+            self._set_knob_target('probe_coarse', current_z)
+
+        elif kind == 'z_offset':
+            z_adjust = round(steps * self.z_adjust_increment, 6)
+            if up:
+                await self._execute_gcode('_FURTHER_KNOB_FIRST_LAYER')
+            else:
+                await self._execute_gcode('_NEARER_KNOB_FIRST_LAYER')
+            cmds = [f"SET_GCODE_OFFSET Z_ADJUST={z_adjust} MOVE=1"]
+
+            # Only adjustments that are sent count towards the saved offset,
+            # ticks dropped by a reset never reach here
+            self._accumulated_z_adjust += z_adjust
+            self._pending_z_offset_save = True
+            self._last_z_adjust_time = time.time()
+
+            # Restart the debounced save
+            self._schedule_z_offset_save()
+
+        elif kind == 'speed':
+            # Get current speed factor
+            result = await self._get_printer_objects(['gcode_move'])
+            current_speed = self._get_knob_base(
+                'speed', result.get('gcode_move', {}).get('speed_factor', 1.0) * 100, .5)
+
+            increment = self.speed_settings["increment"]
+            max_speed = self.speed_settings["max"]
+            min_speed = self.speed_settings["min"]
+
+            # Calculate new speed value
+            if up:
+                new_speed = min(current_speed + increment * abs(steps), max_speed)
+                await self._execute_gcode('_INCREASE_KNOB_SPEED')  # Sound for speed up
+            else:
+                new_speed = max(current_speed - increment * abs(steps), min_speed)
+                await self._execute_gcode('_DEACREASE_KNOB_SPEED')  # Sound for speed down
+
+            cmds = [f"M220 S{int(new_speed)}"]
+            self._set_knob_target('speed', int(new_speed))
+
+        else:
+            # Volume steps are applied one by one by the sound system
+            count = max(1, round(abs(steps)))
+            if up:
+                await self._execute_gcode('_INCREASE_KNOB_VOLUME')  # Sound for volume up
+                for _ in range(count):
+                    await self._execute_gcode('VOLUME_UP')
+            else:
+                await self._execute_gcode('_DEACREASE_KNOB_VOLUME')  # Sound for volume down
+                for _ in range(count):
+                    await self._execute_gcode('VOLUME_DOWN')
+
+        for cmd in cmds:
+            self._trace('knob_command', command=cmd)
+            await self._execute_gcode(f'RESPOND MSG="Numpad macros: {cmd}"')
+            await self._execute_gcode(cmd)
+
+    def _get_knob_base(self, kind: str, reported: float, tolerance: float) -> float:
+        """Value to adjust from, the last knob target until the snapshot reports it"""
+        target = self._knob_targets.get(kind)
+        if target is None:
+            return reported
+        value, sent = target
+        if abs(reported - value) <= tolerance or time.monotonic() - sent > KNOB_TARGET_HOLD:
+            # Caught up, or changed by something else since
+            del self._knob_targets[kind]
+            return reported
+        return value
+
+    def _set_knob_target(self, kind: str, value: float) -> None:
+        self._knob_targets[kind] = (value, time.monotonic())
+
+    async def _subscribe_printer_state(self) -> None:
+        """Subscribe to the printer objects used on the knob path"""
         kapis: KlippyAPI = self.server.lookup_component('klippy_apis')
         try:
-            result = await kapis.query_objects({
-                'print_stats': None,
-                'gcode_macro CHECK_PROBE_STATUS': None  # Query our macro
-            })
+            status = await kapis.subscribe_objects(
+                SUBSCRIBED_OBJECTS, self._handle_status_notification
+            )
+        except Exception:
+            self.logger.exception("Error subscribing to printer objects, falling back to queries")
+            self._state_subscribed = False
+            return
+
+        self._printer_state = {
+            obj: dict(status.get(obj, {})) for obj in SUBSCRIBED_OBJECTS
+        }
+        self._state_subscribed = True
+        if self.debug_log:
+            self.logger.debug(f"Subscribed printer state: {self._printer_state}")
+
+    def _handle_status_notification(
+            self, status: Dict[str, Dict[str, Any]], eventtime: float
+    ) -> None:
+        """Merge a Klippy status notification into the state snapshot"""
+        for obj, fields in status.items():
+            if obj in SUBSCRIBED_OBJECTS:
+                self._printer_state.setdefault(obj, {}).update(fields)
+
+        # Follow finetune_z_nozzle_offset when it is changed by other macros
+        variables = status.get('save_variables', {}).get('variables', {})
+        if 'finetune_z_nozzle_offset' in variables:
+            self._current_finetune_nozzle_offset = float(variables['finetune_z_nozzle_offset'])
+
+        # Persist fine-tuning as soon as the print is paused, cancelled or ends
+        print_state = status.get('print_stats', {}).get('state')
+        if print_state is not None and print_state != 'printing' and self._pending_z_offset_save:
+            self.event_loop.register_callback(self._flush_z_offset_save)
+
+    async def _get_printer_objects(self, objects: List[str]) -> Dict[str, Any]:
+        """Return printer objects from the snapshot, querying Klippy only when not subscribed"""
+        if self._state_subscribed:
+            return {obj: self._printer_state.get(obj, {}) for obj in objects}
+        kapis: KlippyAPI = self.server.lookup_component('klippy_apis')
+        return await kapis.query_objects({obj: None for obj in objects})
 
-            if self.debug_log:
-                self.logger.debug(f'Klippy state query result: {result}')
-                self.logger.debug(f"CHECK_PROBE_STATUS result: {result.get('gcode_macro CHECK_PROBE_STATUS', {})}")
+    async def _check_klippy_state(self) -> None:
+        """Update internal state based on Klippy status"""
+        start = time.monotonic()
+        try:
+            result = await self._get_printer_objects([
+                'print_stats',
+                'gcode_macro CHECK_PROBE_STATUS'  # Query our macro
+            ])
 
             probe_status = result.get('gcode_macro CHECK_PROBE_STATUS', {})
             previous_probing = self.is_probing
@@ -438,11 +883,7 @@ class NumpadMacros:
             if not previous_probing and self.is_probing:
                 self.is_fine_tuning = False
                 self.quick_jumps_count = 0
-                if self.debug_log:
-                    self.logger.debug("New probe operation started - Reset fine tuning mode and quick jumps counter")
-
-            if self.debug_log:
-                self.logger.debug(f"Probe status change: {previous_probing} -> {self.is_probing}")
+                self._trace('probe_started')
 
             self._is_printing = result.get('print_stats', {}).get('state', '') == 'printing'
 
@@ -450,15 +891,11 @@ class NumpadMacros:
             probe_status = result.get('gcode_macro CHECK_PROBE_STATUS', {})
             self.is_probing = probe_status.get('monitor_active', False)
 
-            if self.debug_log:
-                await self._execute_gcode(
-                    f'RESPOND MSG="Numpad macros: State update - '
-                    f'Printing: {self._is_printing}, '
-                    f'Probing: {self.is_probing}, '
-                    f'Probe Status: {probe_status}"'
-                )
+            self._trace('state_check', printing=self._is_printing, probing=self.is_probing,
+                        subscribed=self._state_subscribed)
 
             self._notify_status_update()
+            self._note_event_stage('state_check', start)
 
         except Exception as e:
             msg = f"{self.name}: Error fetching Klippy state: {str(e)}"
@@ -467,85 +904,268 @@ class NumpadMacros:
             self._reset_state()
             raise self.server.error(msg, 503)
 
-    def get_status(self) -> Dict[str, Any]:
-        """Return component status"""
+    def _get_static_status(self) -> Dict[str, Any]:
+        """Return the configuration part of the status, only changes on reload"""
         return {
             'command_mapping': self.command_mapping,
             'query_mapping': self.initial_query_command_mapping,
+            'no_confirm_keys': sorted(self.no_confirm_keys),
+            'confirmation_keys': sorted(self.confirmation_keys),
+            'immediate_keys': sorted(self.immediate_keys),
+            'batch_exclude_keys': sorted(self.batch_exclude_keys)
+        }
+
+    def _get_dynamic_status(self) -> Dict[str, Any]:
+        """Return the state part of the status, published as deltas"""
+        return {
             'pending_key': self.pending_key,
             'pending_command': self.pending_command,
             'is_printing': self._is_printing,
             'is_probing': self.is_probing,
-            'no_confirm_keys': list(self.no_confirm_keys),
-            'confirmation_keys': list(self.confirmation_keys)
+            'service_state': self._service_state,
+            'service_restarts': self._service_restarts
         }
 
+    def get_status(self) -> Dict[str, Any]:
+        """Return component status"""
+        status = self._get_static_status()
+        status.update(self._last_status)
+        status['version'] = self._status_version
+        return status
+
     def _notify_status_update(self) -> None:
-        """Notify clients of status changes"""
+        """Notify clients of the status fields that changed since the last update"""
+        current = self._get_dynamic_status()
+        changes = {
+            field: value for field, value in current.items()
+            if field not in self._last_status or self._last_status[field] != value
+        }
+        if not changes:
+            return
+
+        self._status_version += 1
+        self._last_status = current
+        self._status_changes.append((self._status_version, changes))
         self.server.send_event(
             "numpad_macros:status_update",
-            self.get_status()
+            {'version': self._status_version, 'changes': changes}
+        )
+
+    def _notify_config_update(self) -> None:
+        """Publish the static key mapping, clients cache it between reloads"""
+        self.server.send_event(
+            "numpad_macros:config_update",
+            {'version': self._status_version, 'config': self._get_static_status()}
+        )
+
+    def _get_status_since(self, since: int) -> Dict[str, Any]:
+        """Return the changes after version `since`, or the full status when too old"""
+        if since == self._status_version:
+            return {'version': self._status_version, 'changes': {}}
+        if (
+            0 <= since < self._status_version and self._status_changes
+            and self._status_changes[0][0] <= since + 1
+        ):
+            merged: Dict[str, Any] = {}
+            for version, changes in self._status_changes:
+                if version > since:
+                    merged.update(changes)
+            return {'version': self._status_version, 'changes': merged}
+        return {'version': self._status_version, 'status': self.get_status()}
+
+    async def _run_systemctl(self, *args: str, timeout: float = 30.) -> Tuple[int, str]:
+        """Run systemctl without blocking the event loop"""
+        proc = await asyncio.create_subprocess_exec(
+            'systemctl', *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
         )
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        return proc.returncode, stdout.decode().strip()
 
-    def _restart_numpad_event_service(self):
+    async def _restart_numpad_event_service(self) -> None:
         """Restart the numpad_event_service using systemctl"""
+        if self._service_restarting:
+            return
+        self._service_restarting = True
+        start = time.monotonic()
         try:
             self.logger.info("Restarting numpad_event_service...")
-            subprocess.run(["systemctl", "restart", "numpad_event_service"], check=True)
-            self.logger.info("numpad_event_service restarted successfully.")
-        except subprocess.CalledProcessError as e:
+            retcode, output = await self._run_systemctl('restart', self.service_name)
+            if retcode:
+                self.logger.error(f"Failed to restart numpad_event_service: {output}")
+            else:
+                self.logger.info("numpad_event_service restarted successfully.")
+                # Give the restarted service a full stale period to check in
+                self._service_last_seen = time.monotonic()
+            self._service_restarts += 1
+        except Exception as e:
             self.logger.error(f"Failed to restart numpad_event_service: {e}")
+        finally:
+            self._service_restart_duration = round(time.monotonic() - start, 3)
+            self._service_restarting = False
+            # Cleared again as soon as the service checks in
+            self._service_failed_restarts += 1
+            self._service_next_restart = time.monotonic() + (
+                self.service_check_interval * 2 ** self._service_failed_restarts
+            )
+
+    async def _check_service_health(self, eventtime: float) -> float:
+        """Restart numpad_event_service only when it has failed or gone stale while active.
+
+        Units that are starting, stopping or were stopped on purpose are left alone."""
+        try:
+            _, state = await self._run_systemctl('is-active', self.service_name, timeout=10.)
+        except Exception as e:
+            self.logger.error(f"Error checking numpad_event_service state: {e}")
+            state = 'unknown'
+        self._service_state = state or 'unknown'
+
+        reason = None
+        since_seen = time.monotonic() - self._service_last_seen
+        if state == 'failed':
+            reason = "numpad_event_service has failed"
+        elif state == 'active' and since_seen > self.service_stale_timeout:
+            self._service_state = 'stale'
+            reason = f"numpad_event_service not heard from in {since_seen:.0f}s"
+
+        if reason is None:
+            pass
+        elif self._service_failed_restarts >= self.service_max_restarts:
+            if self._service_failed_restarts == self.service_max_restarts:
+                self.logger.error(
+                    f"{reason}, giving up after {self.service_max_restarts} restarts"
+                )
+                self._service_failed_restarts += 1
+        elif time.monotonic() >= self._service_next_restart:
+            self.logger.info(f"{reason}, restarting")
+            await self._restart_numpad_event_service()
+        self._notify_status_update()
+        return eventtime + self.service_check_interval
+
+    def _mark_service_seen(self) -> None:
+        self._service_last_seen = time.monotonic()
+        self._service_failed_restarts = 0
+        self._service_next_restart = 0.
+
+    def _get_service_status(self) -> Dict[str, Any]:
+        return {
+            'state': self._service_state,
+            'last_seen': round(time.monotonic() - self._service_last_seen, 1),
+            'restarts': self._service_restarts,
+            'last_restart_duration': self._service_restart_duration,
+            'queue': self._service_queue
+        }
+
+    async def _handle_heartbeat(self, web_request: WebRequest) -> Dict[str, Any]:
+        """Handle heartbeat from numpad_event_service"""
+        self._mark_service_seen()
+        args = web_request.get_args()
+        self._service_queue = {
+            name: args[name] for name in ('queued', 'merged', 'dropped', 'expired')
+            if name in args
+        }
+        return {'status': 'ok'}
+
+    async def component_init(self) -> None:
+        """Publish the key mapping and supervise numpad_event_service from load,
+        whether or not Klippy is up"""
+        self._notify_config_update()
+        self._service_timer.start()
 
     async def _handle_ready(self):
-        """Handle the server ready event by restarting the numpad_event_service"""
+        """Handle the server ready event, checking on the numpad_event_service"""
         self.logger.info("Handling server ready event.")
-        self._restart_numpad_event_service()
+        await self._subscribe_printer_state()
+        await self._load_finetune_z_offset()
         await self._check_klippy_state()
+        if self._pending_z_offset_save:
+            # Retry an adjustment that could not be saved before a restart
+            await self._flush_z_offset_save()
 
     async def _handle_shutdown(self):
         """Handle the server shutdown event"""
         self.logger.info("Handling server shutdown event.")
+        await self._flush_z_offset_save()
         self._reset_state()
 
-    async def _delayed_save_z_offset(self) -> None:
+    async def _handle_disconnect(self):
+        """Drop the state snapshot, it is rebuilt on the next ready event"""
+        self._state_subscribed = False
+        self._printer_state = {}
+
+    def _schedule_z_offset_save(self) -> None:
+        """(Re)start the single debounced save timer for the Z fine-tune offset"""
+        if self._z_offset_save_handle is not None:
+            self._z_offset_save_handle.cancel()
+        self._z_offset_save_handle = self.event_loop.delay_callback(
+            self.z_offset_save_delay, self._save_z_offset
+        )
+
+    async def _flush_z_offset_save(self) -> None:
+        """Save any pending Z fine-tune adjustment right away"""
+        if self._z_offset_save_handle is not None:
+            self._z_offset_save_handle.cancel()
+            self._z_offset_save_handle = None
+        await self._save_z_offset()
+
+    async def _save_z_offset(self) -> None:
         """Save the accumulated Z adjustment to finetune_z_nozzle_offset variable"""
-        try:
-            # Wait for the delay period
-            await asyncio.sleep(self.z_offset_save_delay)
-
-            # Only proceed if this is the most recent adjustment
-            if self._pending_z_offset_save:
-                # Get current finetune_z_nozzle_offset
-                kapis: KlippyAPI = self.server.lookup_component('klippy_apis')
-                result = await kapis.query_objects({'save_variables': None})
-                current_offset = result.get('save_variables', {}).get('variables', {}).get('finetune_z_nozzle_offset', 0.0)
-                
-                # Add the accumulated adjustment to current offset
-                new_offset = float(current_offset) + self._accumulated_z_adjust
-
-                # Save the new finetune_z_nozzle_offset
+        self._z_offset_save_handle = None
+        # Serialize saves so a flush racing the timer never writes twice
+        async with self._z_offset_save_lock:
+            if not self._pending_z_offset_save:
+                return
+
+            # The in-memory value is authoritative, no need to read it back first
+            saved_adjust = self._accumulated_z_adjust
+            new_offset = round(self._current_finetune_nozzle_offset + saved_adjust, 6)
+            try:
+                # Never part of an event batch, the timer inherits the event context
                 await self._execute_gcode(
-                    f'SAVE_VARIABLE VARIABLE=finetune_z_nozzle_offset VALUE={new_offset}'
+                    f'SAVE_VARIABLE VARIABLE=finetune_z_nozzle_offset VALUE={new_offset}',
+                    immediate=True
                 )
-
-                if self.debug_log:
-                    self.logger.debug(
-                        f"Updated finetune_z_nozzle_offset: current({current_offset}) adjusted by "
-                        f"({self._accumulated_z_adjust}) = new({new_offset})"
+            except Exception as e:
+                # Keep the adjustment pending, it is retried on the next ready event
+                self.logger.exception("Error saving Z adjustment")
+                try:
+                    await self._execute_gcode(
+                        f'RESPOND TYPE=error MSG="Error saving Z adjustment: {str(e)}"',
+                        immediate=True
                     )
+                except Exception:
+                    pass
+                return
+
+            self._trace('z_offset_saved', previous=self._current_finetune_nozzle_offset,
+                        adjust=saved_adjust, offset=new_offset)
 
-                # Update our tracking of current value
-                self._current_finetune_nozzle_offset = new_offset
-                
-                # Reset tracking variables
+            # Ticks that arrived while saving stay accumulated for the next save
+            self._current_finetune_nozzle_offset = new_offset
+            self._accumulated_z_adjust -= saved_adjust
+            if abs(self._accumulated_z_adjust) < 1e-9:
                 self._accumulated_z_adjust = 0.0
                 self._pending_z_offset_save = False
+            else:
+                self._schedule_z_offset_save()
 
-        except Exception as e:
-            self.logger.exception("Error saving Z adjustment")
-            await self._execute_gcode(
-                f'RESPOND TYPE=error MSG="Error saving Z adjustment: {str(e)}"'
-            )
+    async def _load_finetune_z_offset(self) -> None:
+        """Load finetune_z_nozzle_offset once, later changes arrive through the subscription"""
+        try:
+            result = await self._get_printer_objects(['save_variables'])
+        except Exception:
+            self.logger.exception("Error loading finetune_z_nozzle_offset")
+            return
+        variables = result.get('save_variables', {}).get('variables', {})
+        self._current_finetune_nozzle_offset = float(
+            variables.get('finetune_z_nozzle_offset', 0.0)
+        )
 
     def _reset_state(self) -> None:
         """Reset all state variables"""
@@ -555,30 +1175,162 @@ class NumpadMacros:
         self.is_probing = False
         self.quick_jumps_count = 0
         self.is_fine_tuning = False
-        self._accumulated_z_adjust = 0.0
-        self._pending_z_offset_save = False
-        self._last_z_adjust_time = 0.0
+        if self._knob_flush_handle is not None:
+            self._knob_flush_handle.cancel()
+            self._knob_flush_handle = None
+        self._knob_pending_kind = None
+        self._knob_pending_ticks = 0
+        self._knob_pending_steps = 0.
+        self._knob_targets.clear()
         self._notify_status_update()
 
     async def _get_toolhead_position(self) -> Dict[str, float]:
         """Get current toolhead position"""
-        kapis: KlippyAPI = self.server.lookup_component('klippy_apis')
-        result = await kapis.query_objects({'toolhead': None})
+        result = await self._get_printer_objects(['toolhead'])
         pos = result.get('toolhead', {}).get('position', [0., 0., 0., 0.])
         return {
             'x': pos[0], 'y': pos[1], 'z': pos[2], 'e': pos[3]
         }
 
-    async def _execute_gcode(self, command: str) -> None:
-        """Execute a gcode command"""
+    async def _execute_gcode(self, command: str, immediate: bool = False) -> None:
+        """Execute a gcode command, or add it to the current event batch"""
+        batch = _gcode_batch.get()
+        if batch is not None and not immediate:
+            batch.append(command)
+            return
+        kapis: KlippyAPI = self.server.lookup_component('klippy_apis')
+        start = time.monotonic()
+        try:
+            await kapis.run_gcode(command)
+        finally:
+            self._note_event_stage('gcode_dispatch', start)
+
+    async def _flush_gcode_batch(self) -> None:
+        """Send all batched gcode to Klippy as a single script"""
+        batch = _gcode_batch.get()
+        if not batch:
+            return
+        script = "\n".join(batch)
+        self._trace('gcode_batch', lines=len(batch), script=script)
+        batch.clear()
         kapis: KlippyAPI = self.server.lookup_component('klippy_apis')
-        await kapis.run_gcode(command)
+        start = time.monotonic()
+        try:
+            await kapis.run_gcode(script)
+        finally:
+            self._note_event_stage('gcode_dispatch', start)
+
+    def _trace(self, event: str, **fields: Any) -> None:
+        """Record a structured trace event when tracing is enabled"""
+        if self.trace_size:
+            self._trace_buffer.append((time.time(), event, fields))
+
+    def get_trace(self) -> List[Dict[str, Any]]:
+        """Return the trace buffer, oldest event first"""
+        trace = []
+        for timestamp, event, fields in list(self._trace_buffer):
+            entry: Dict[str, Any] = {'time': round(timestamp, 4), 'event': event}
+            for name, value in fields.items():
+                if value is None or isinstance(value, (bool, int, float, str)):
+                    entry[name] = value
+                else:
+                    entry[name] = repr(value)
+            trace.append(entry)
+        return trace
+
+    def _write_trace_file(self, trace: List[Dict[str, Any]]) -> None:
+        with open(self.trace_file, 'w') as f:
+            for entry in trace:
+                fields = " ".join(
+                    f"{name}={value!r}" for name, value in entry.items()
+                    if name not in ('time', 'event')
+                )
+                stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time']))
+                f.write(f"{stamp}.{int(entry['time'] * 1000) % 1000:03d} {entry['event']} {fields}\n")
+
+    async def _handle_trace_request(
+            self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        """Handle trace request endpoint, `dump=true` also writes the trace file"""
+        trace = self.get_trace()
+        if web_request.get_boolean('dump', False):
+            await self.event_loop.run_in_thread(self._write_trace_file, trace)
+            return {'trace': trace, 'file': self.trace_file}
+        return {'trace': trace}
+
+    def _set_event_mode(self, mode: str) -> None:
+        """Record how the current event is handled, used to group latencies"""
+        timing = _event_timing.get()
+        if timing is not None:
+            timing['mode'] = mode
+
+    def _note_event_stage(self, stage: str, start: float) -> None:
+        """Note the duration of a stage of the current event"""
+        timing = _event_timing.get()
+        if timing is not None:
+            timing['stages'].append((stage, (time.monotonic() - start) * 1000.))
+
+    def _record_latency(self, key: Optional[str], mode: str, stage: str, value_ms: float) -> None:
+        targets = [self._mode_latency.setdefault(mode, {})]
+        if key is not None:
+            # Keys come from clients, only configured ones get their own histograms
+            if key not in self.command_mapping:
+                key = 'other'
+            targets.append(self._key_latency.setdefault(key, {}))
+        for stages in targets:
+            hist = stages.get(stage)
+            if hist is None:
+                hist = stages[stage] = LatencyHistogram()
+            hist.add(value_ms)
+
+    def _finish_event_timing(self, timing: Dict[str, Any]) -> None:
+        """Add the stages of a completed event to the latency histograms"""
+        key = timing['key']
+        mode = timing['mode'] or 'unknown'
+        for stage, value_ms in timing['stages']:
+            self._record_latency(key, mode, stage, value_ms)
+        if timing['received'] is None:
+            return
+        handling = (time.monotonic() - timing['received']) * 1000.
+        self._record_latency(key, mode, 'handling', handling)
+        if 'transport' in timing:
+            self._record_latency(key, mode, 'transport', timing['transport'])
+            self._record_latency(key, mode, 'end_to_end', timing['transport'] + handling)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return latency percentiles (ms) per key and per mode"""
+        return {
+            'keys': {
+                key: {stage: hist.get_status() for stage, hist in stages.items()}
+                for key, stages in self._key_latency.items()
+            },
+            'modes': {
+                mode: {stage: hist.get_status() for stage, hist in stages.items()}
+                for mode, stages in self._mode_latency.items()
+            }
+        }
+
+    async def _handle_metrics_request(
+            self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        """Handle metrics request endpoint, with the service supervision details"""
+        return {'metrics': self.get_metrics(), 'service': self._get_service_status()}
 
     async def _handle_status_request(
             self, web_request: WebRequest
     ) -> Dict[str, Any]:
-        """Handle status request endpoint"""
+        """Handle status request endpoint, `since` returns only the changes after that version"""
+        since = web_request.get_int('since', None)
+        if since is not None:
+            return self._get_status_since(since)
         return {'status': self.get_status()}
 
+    async def close(self) -> None:
+        """Save pending Z fine-tuning and stop running jobs before Moonraker exits"""
+        self._service_timer.stop()
+        await self._flush_z_offset_save()
+        for task in list(self._job_tasks.values()):
+            task.cancel()
+
 def load_component(config: ConfigHelper) -> NumpadMacros:
     return NumpadMacros(config)
\ No newline at end of file
@@ -1,28 +1,124 @@
 #!/usr/bin/env python3
-import keyboard
+import asyncio
+import fnmatch
+import glob
 import requests
 import json
+import os
 import time
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from logging.handlers import RotatingFileHandler
-from typing import Dict, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    import evdev
+    from evdev import ecodes
+except ImportError:
+    evdev = None
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
 
 # Configuration
 MOONRAKER_URL = "http://localhost:7125"
+MOONRAKER_WS_URL = "ws://localhost:7125/websocket"
+MOONRAKER_UDS_PATH = "/home/pi/printer_data/comms/moonraker.sock"
+
+# Transport to Moonraker: "websocket" or "unix" keep one JSON-RPC connection open,
+# "http" posts each event (used as fallback when websockets is not installed)
+MOONRAKER_TRANSPORT = "websocket"
+
+# Reconnect backoff (in seconds), doubled after every failed attempt up to the maximum
+RECONNECT_DELAY = 0.5
+RECONNECT_DELAY_MAX = 10.0
+
+# Heartbeat interval (in seconds) over the JSON-RPC connection
+RPC_HEARTBEAT_INTERVAL = 10.0
 LOG_FILE = "/home/pi/printer_data/logs/numpad_event_service.log"
 MAX_LOG_SIZE = 5 * 1024 * 1024  # 5 MB
 BACKUP_COUNT = 3
 
 # Debounce configuration (in milliseconds)
 DEBOUNCE_CONFIG = {
-    "key_up": 600,    # 600ms for up key
-    "key_down": 600,  # 600ms for down key
-    "default": 200     # 50ms default for other keys
+    "key_up": 25,     # 25ms for up key, only filters contact bounce
+    "key_down": 25,   # 25ms for down key, only filters contact bounce
+    "default": 200    # 200ms default for other keys, filters accidental double presses
 }
 
 # Request timeout (in seconds)
 REQUEST_TIMEOUT = 0.5  # 500ms timeout for Moonraker requests
 
+# Delivery queue between key capture and the sender (events)
+SEND_QUEUE_SIZE = 32
+
+# Keys that are never dropped from a full delivery queue
+PROTECTED_KEYS = {"key_enter", "key_enter_alt", "key_dot"}
+
+# Events that could not be delivered are held while Moonraker restarts and replayed
+# in order once /server/info reports Klippy settled, unless older than their expiry
+# (in seconds). E-stop and confirm presses are never replayed late.
+EVENT_EXPIRY = {
+    "key_dot": 1.0,
+    "key_enter": 1.0,
+    "key_enter_alt": 1.0,
+    "key_up": 3.0,
+    "key_down": 3.0,
+    "default": 10.0
+}
+
+# Klippy states in which Moonraker can take numpad events again
+SETTLED_KLIPPY_STATES = {"ready", "error", "shutdown"}
+
+# Knob keys, repeated ticks waiting in the queue are merged into one event
+KNOB_KEYS = {"key_up", "key_down"}
+
+# Knob acceleration: ticks closer together than KNOB_SPIN_WINDOW (seconds) belong to
+# one spin or hold, each further tick raises the step rate by KNOB_ACCEL_STEP up to
+# KNOB_MAX_RATE. A single tick always moves by one step.
+KNOB_SPIN_WINDOW = 0.25
+KNOB_ACCEL_STEP = 0.5
+KNOB_MAX_RATE = 10.0
+
+# Heartbeat interval (in seconds), lets Moonraker tell a hung service from an idle numpad
+HEARTBEAT_INTERVAL = 30
+
+# Input backend: "evdev" reads only the numpad/knob devices, "keyboard" uses the
+# keyboard package's global hook (used as fallback when evdev is not installed)
+INPUT_BACKEND = "evdev"
+
+# Devices to read with the evdev backend, matched against the device name or
+# path (glob patterns allowed). Empty picks devices automatically, see below.
+INPUT_DEVICES: List[str] = []
+
+# Automatic selection when INPUT_DEVICES is empty. Full keyboards have numpad keys
+# too, so a device with numpad or volume keys is only taken when its lower-cased name
+# matches AUTO_DEVICE_NAMES or its USB (vendor, product) IDs are in AUTO_DEVICE_IDS.
+AUTO_DEVICE_NAMES = ["*numpad*", "*keypad*", "*numeric*"]
+AUTO_DEVICE_IDS: List[Tuple[int, int]] = []
+
+# Grab the devices exclusively so key presses don't reach the console
+GRAB_DEVICES = False
+
+# Interval (in seconds) between scans of /dev/input for plugged/unplugged devices
+HOTPLUG_SCAN_INTERVAL = 2.0
+
+# Printers served by this host. Each entry binds its input devices (patterns as in
+# INPUT_DEVICES) to its own Moonraker, with a separate delivery queue and connection
+# so a slow printer never holds up input for the others. Options left out fall back
+# to the settings above: "transport", "url", "ws_url", "uds_path", "devices" and
+# "scan_code_mapping" (merged over SCAN_CODE_MAPPING). Empty serves one printer.
+# PRINTERS = [
+#     {"name": "lister1", "devices": ["/dev/input/by-path/*usb-0:1.2*"],
+#      "ws_url": "ws://localhost:7125/websocket"},
+#     {"name": "lister2", "devices": ["/dev/input/by-path/*usb-0:1.3*"],
+#      "transport": "unix", "uds_path": "/home/pi/printer_2_data/comms/moonraker.sock"},
+# ]
+PRINTERS: List[Dict[str, Any]] = []
+
 # Scan code to key name mapping
 SCAN_CODE_MAPPING = {
     # Numpad specific keys
@@ -71,96 +167,699 @@ SCAN_CODE_MAPPING = {
 # Set up logging
 logger = logging.getLogger("NUMPAD")
 logger.setLevel(logging.INFO)
-handler = RotatingFileHandler(LOG_FILE, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(name)s] - %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
 
-# Debounce state tracking
-last_key_time: Dict[str, float] = {}
+def setup_logging():
+    """Log to LOG_FILE, done in main() so the module can be imported by tools"""
+    handler = RotatingFileHandler(LOG_FILE, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(name)s] - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
 
-def send_to_moonraker(event_data):
-    """Send key event data to Moonraker with timeout"""
-    try:
-        response = requests.post(
-            f"{MOONRAKER_URL}/server/numpad/event",
-            json=event_data,
-            timeout=REQUEST_TIMEOUT
+def get_debounce_time(key_name: str) -> float:
+    """Get the debounce time for a specific key (converts ms to seconds)"""
+    ms_time = DEBOUNCE_CONFIG.get(key_name, DEBOUNCE_CONFIG['default'])
+    return ms_time / 1000.0  # Convert milliseconds to seconds
+
+def uses_rpc_transport(transport: str = MOONRAKER_TRANSPORT) -> bool:
+    """Whether events go over a persistent JSON-RPC connection instead of HTTP"""
+    if transport == "websocket" and websockets is None:
+        return False
+    return transport in ("websocket", "unix")
+
+class DeliveryQueue:
+    """Bounded, ordered queue of events waiting to be sent to Moonraker"""
+
+    def __init__(self, maxsize: int, log: logging.Logger = logger):
+        self.maxsize = maxsize
+        self.logger = log
+        self.events: Deque[Dict[str, Any]] = deque()
+        self.wakeup = asyncio.Event()
+        self.merged = 0
+        self.dropped = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def put(self, event: Dict[str, Any]):
+        """Queue an event, never blocks"""
+        key = event["key"]
+
+        # Fold a knob tick into the same knob's tick still waiting at the tail
+        if key in KNOB_KEYS and self.events and self.events[-1]["key"] == key:
+            tail = self.events[-1]
+            tail_ticks = tail.get("ticks", 1)
+            ticks = tail_ticks + event.get("ticks", 1)
+            # Keep the total steps (ticks * rate) of both events
+            tail["rate"] = (tail_ticks * tail.get("rate", 1.) +
+                            event.get("ticks", 1) * event.get("rate", 1.)) / ticks
+            tail["ticks"] = ticks
+            self.merged += 1
+            self.logger.debug(f"Merged {key} into queued event, ticks={tail['ticks']}")
+            return
+
+        if len(self.events) >= self.maxsize:
+            # Make room by dropping the oldest event that may be dropped
+            victim = next((e for e in self.events if e["key"] not in PROTECTED_KEYS), None)
+            if victim is not None:
+                self.events.remove(victim)
+            elif key not in PROTECTED_KEYS:
+                victim = event
+            if victim is not None:
+                self.dropped += 1
+                self.logger.warning(f"Delivery queue full, dropped event: {victim}")
+                if victim is event:
+                    return
+
+        self.events.append(event)
+        self.wakeup.set()
+
+    async def get(self) -> Dict[str, Any]:
+        while not self.events:
+            self.wakeup.clear()
+            await self.wakeup.wait()
+        return self.events.popleft()
+
+    def requeue(self, event: Dict[str, Any]):
+        """Put an undelivered event back at the head so it is sent first"""
+        self.events.appendleft(event)
+        self.wakeup.set()
+
+    def expire(self, current_time: float) -> int:
+        """Drop held events older than their key's expiry, returns how many"""
+        kept = deque(
+            e for e in self.events
+            if current_time - e["time"] <= EVENT_EXPIRY.get(e["key"], EVENT_EXPIRY["default"])
         )
+        expired = len(self.events) - len(kept)
+        if expired:
+            self.logger.warning(f"Expired {expired} held events")
+        self.events = kept
+        self.expired += expired
+        return expired
+
+class HttpMoonraker:
+    """Event delivery over one persistent HTTP session, readiness polled from /server/info"""
+
+    def __init__(self, target: "PrinterTarget"):
+        self.target = target
+        self.logger = target.logger
+        self.session = requests.Session()
+        # Set while Moonraker takes events, cleared when a send finds it unreachable
+        self.ready = asyncio.Event()
+        self.lost = asyncio.Event()
+        self.lost.set()
+
+    def _post_event(self, event_data: Dict[str, Any]) -> bool:
+        """Send key event data to Moonraker with timeout, False when Moonraker is unreachable"""
+        try:
+            response = self.session.post(
+                f"{self.target.url}/server/numpad/event",
+                json=event_data,
+                timeout=REQUEST_TIMEOUT
+            )
+            response.raise_for_status()
+            self.logger.info(f"Sent event data to Moonraker: {event_data}")
+        except requests.ConnectionError as e:
+            self.logger.error(f"Moonraker unreachable, holding event: {e}")
+            return False
+        except requests.Timeout:
+            self.logger.warning("Moonraker request timed out - likely busy with macro")
+        except requests.RequestException as e:
+            self.logger.error(f"Error sending event data to Moonraker: {e}")
+        return True
+
+    def _post_heartbeat(self):
+        try:
+            requests.post(
+                f"{self.target.url}/server/numpad/heartbeat",
+                json=self.target.get_delivery_stats(),
+                timeout=REQUEST_TIMEOUT
+            )
+        except requests.RequestException as e:
+            self.logger.debug(f"Heartbeat failed: {e}")
+
+    async def _heartbeat_loop(self):
+        """Periodically tell Moonraker the service is alive"""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Off the send worker, so a slow printer does not delay its heartbeat
+            await loop.run_in_executor(None, self._post_heartbeat)
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    def _get_server_info(self) -> Dict[str, Any]:
+        response = self.session.get(f"{self.target.url}/server/info", timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        logger.info(f"Sent event data to Moonraker: {event_data}")
-    except requests.Timeout:
-        logger.warning("Moonraker request timed out - likely busy with macro")
-    except requests.RequestException as e:
-        logger.error(f"Error sending event data to Moonraker: {e}")
+        return response.json()["result"]
 
-def get_key_name(scan_code: int, original_name: str) -> str:
-    """Get mapped key name from scan code or fallback to original with key_ prefix"""
-    # First check if we have a specific mapping for this scan code
-    if scan_code in SCAN_CODE_MAPPING:
-        return SCAN_CODE_MAPPING[scan_code]
+    async def _wait_until_settled(self):
+        loop = asyncio.get_running_loop()
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                info = await loop.run_in_executor(self.target.executor, self._get_server_info)
+                if info.get("klippy_state") in SETTLED_KLIPPY_STATES:
+                    return
+                self.logger.info(f"Waiting for Klippy, state: {info.get('klippy_state')}")
+            except (requests.RequestException, ValueError, KeyError) as e:
+                self.logger.debug(f"Moonraker not available: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
 
-    # If no mapping exists, fallback to adding key_ prefix to original name
-    return f"key_{original_name}"
+    async def run(self):
+        """Wait for Moonraker to be ready again whenever it was lost"""
+        heartbeat = asyncio.get_running_loop().create_task(self._heartbeat_loop())
+        try:
+            while True:
+                await self.lost.wait()
+                await self._wait_until_settled()
+                self.lost.clear()
+                self.ready.set()
+        finally:
+            heartbeat.cancel()
+            self.session.close()
 
-def get_debounce_time(key_name: str) -> float:
-    """Get the debounce time for a specific key (converts ms to seconds)"""
-    ms_time = DEBOUNCE_CONFIG.get(key_name, DEBOUNCE_CONFIG['default'])
-    return ms_time / 1000.0  # Convert milliseconds to seconds
+    async def send_event(self, event_data: Dict[str, Any]) -> bool:
+        """Send an event, False when it could not be delivered and should be held"""
+        loop = asyncio.get_running_loop()
+        delivered = await loop.run_in_executor(self.target.executor, self._post_event, event_data)
+        if not delivered:
+            self.ready.clear()
+            self.lost.set()
+        return delivered
 
-def should_process_key(key_name: str, current_time: float) -> bool:
-    """Check if enough time has passed since the last key press"""
-    last_time = last_key_time.get(key_name, 0)
-    debounce_time = get_debounce_time(key_name)
-    time_diff = current_time - last_time
+class MoonrakerRPC:
+    """Persistent JSON-RPC connection to Moonraker over a websocket or its unix socket"""
 
-    if time_diff >= debounce_time:
-        last_key_time[key_name] = current_time
-        logger.debug(f"Processing key {key_name}: time since last press = {time_diff*1000:.1f}ms")
+    def __init__(self, target: "PrinterTarget"):
+        self.target = target
+        self.transport = target.transport
+        self.logger = target.logger
+        self.next_id = 1
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.connected = asyncio.Event()
+        # Set while connected and Klippy is settled, events are held otherwise
+        self.ready = asyncio.Event()
+        self.settle_task: Optional[asyncio.Task] = None
+        self.websocket = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        # Numpad state from numpad_macros:* notifications
+        self.state: Dict[str, Any] = {}
+
+    async def _send(self, message: Dict[str, Any]):
+        data = json.dumps(message)
+        if self.websocket is not None:
+            try:
+                await self.websocket.send(data)
+            except Exception as e:
+                raise ConnectionError(f"Websocket closed: {e}") from e
+        elif self.writer is not None:
+            # Moonraker's unix socket frames messages with an ETX byte
+            self.writer.write(data.encode() + b"\x03")
+            await self.writer.drain()
+        else:
+            raise ConnectionError("Not connected to Moonraker")
+
+    async def call(self, method: str, params: Optional[Dict[str, Any]] = None,
+                   timeout: float = REQUEST_TIMEOUT) -> Any:
+        """Send a JSON-RPC request and wait for its result"""
+        if not self.connected.is_set():
+            raise ConnectionError("Not connected to Moonraker")
+        req_id = self.next_id
+        self.next_id += 1
+        fut = asyncio.get_running_loop().create_future()
+        self.pending[req_id] = fut
+        try:
+            await self._send({"jsonrpc": "2.0", "method": method, "params": params or {}, "id": req_id})
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            self.pending.pop(req_id, None)
+
+    def _handle_message(self, data):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            self.logger.warning(f"Invalid message from Moonraker: {data!r}")
+            return
+        if "id" in message:
+            fut = self.pending.get(message["id"])
+            if fut is None or fut.done():
+                return
+            if "error" in message:
+                fut.set_exception(RuntimeError(message["error"].get("message", message["error"])))
+            else:
+                fut.set_result(message.get("result"))
+            return
+        self._handle_notification(message.get("method", ""), message.get("params") or [])
+
+    def _handle_notification(self, method: str, params: List[Any]):
+        if method == "notify_klippy_disconnected":
+            self.logger.info("Klippy disconnected, holding events")
+            self.ready.clear()
+            self._start_settle()
+            return
+        if method in ("notify_klippy_ready", "notify_klippy_shutdown"):
+            self.ready.set()
+            return
+        payload = params[0] if params else {}
+        if not isinstance(payload, dict):
+            return
+        if method == "notify_status_update" and "changes" in payload:
+            self.state.update(payload["changes"])
+            self.state["version"] = payload.get("version")
+            self.logger.debug(f"Numpad state update: {payload['changes']}")
+        elif method == "notify_command_queued":
+            self.logger.info(f"Command pending confirmation: {payload.get('command')}")
+        elif method in ("notify_job_queued", "notify_job_started",
+                        "notify_job_completed", "notify_job_failed"):
+            self.logger.info(f"Job {payload.get('job_id')} {payload.get('state')}: {payload.get('command')}")
+
+    async def _connect(self):
+        if self.transport == "unix":
+            reader, self.writer = await asyncio.open_unix_connection(self.target.uds_path)
+            return reader
+        self.websocket = await websockets.connect(
+            self.target.ws_url, ping_interval=RPC_HEARTBEAT_INTERVAL, ping_timeout=RPC_HEARTBEAT_INTERVAL
+        )
+        return None
+
+    async def _read_loop(self, reader: Optional[asyncio.StreamReader]):
+        if self.websocket is not None:
+            async for data in self.websocket:
+                self._handle_message(data)
+            return
+        while True:
+            data = await reader.readuntil(b"\x03")
+            self._handle_message(data[:-1].decode())
+
+    async def _heartbeat_loop(self):
+        """Check the connection and tell the numpad component the service is alive"""
+        while True:
+            await self.call("server.numpad.heartbeat", self.target.get_delivery_stats(), timeout=RPC_HEARTBEAT_INTERVAL)
+            await asyncio.sleep(RPC_HEARTBEAT_INTERVAL)
+
+    async def _wait_until_settled(self):
+        """Poll server.info until Klippy has settled, then accept events again"""
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                info = await self.call("server.info")
+                if info.get("klippy_state") in SETTLED_KLIPPY_STATES:
+                    break
+                self.logger.info(f"Waiting for Klippy, state: {info.get('klippy_state')}")
+            except (asyncio.TimeoutError, RuntimeError) as e:
+                self.logger.debug(f"Moonraker not available: {e}")
+            except ConnectionError:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+        self.ready.set()
+
+    def _start_settle(self):
+        if self.settle_task is None or self.settle_task.done():
+            self.settle_task = asyncio.get_running_loop().create_task(self._wait_until_settled())
+
+    async def send_event(self, event_data: Dict[str, Any]) -> bool:
+        """Send an event, False when it could not be delivered and should be held"""
+        try:
+            await self.call("server.numpad.event", event_data)
+            self.logger.info(f"Sent event data to Moonraker: {event_data}")
+        except asyncio.TimeoutError:
+            self.logger.warning("Moonraker request timed out - likely busy with macro")
+        except ConnectionError as e:
+            self.logger.error(f"Moonraker unreachable, holding event: {e}")
+            self.ready.clear()
+            return False
+        except Exception as e:
+            self.logger.error(f"Error sending event data to Moonraker: {e}")
         return True
 
-    logger.debug(f"Debounced key {key_name}: time since last press = {time_diff*1000:.1f}ms < {debounce_time*1000:.1f}ms")
-    return False
+    async def _on_connected(self):
+        self.connected.set()
+        await self.call("server.connection.identify", {
+            "client_name": "numpad_event_service",
+            "version": "1.0.0",
+            "type": "other",
+            "url": "https://github.com/CWE3D/lister_config"
+        })
+        result = await self.call("server.numpad.status")
+        self.state = dict(result.get("status", {}))
+        self.logger.info(f"Connected to Moonraker over {self.transport}, "
+                    f"pending command: {self.state.get('pending_command')}")
+
+    async def run(self):
+        """Keep the connection open, reconnecting with backoff whenever it drops"""
+        loop = asyncio.get_running_loop()
+        delay = RECONNECT_DELAY
+        while True:
+            read_task = heartbeat = None
+            try:
+                reader = await self._connect()
+                read_task = loop.create_task(self._read_loop(reader))
+                await self._on_connected()
+                delay = RECONNECT_DELAY
+                self._start_settle()
+                heartbeat = loop.create_task(self._heartbeat_loop())
+                done, _ = await asyncio.wait({read_task, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+                raise ConnectionError("Connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Moonraker {self.transport} connection lost: {e}")
+            finally:
+                self.connected.clear()
+                self.ready.clear()
+                for task in (read_task, heartbeat, self.settle_task):
+                    if task is not None:
+                        task.cancel()
+                for fut in self.pending.values():
+                    if not fut.done():
+                        fut.set_exception(ConnectionError("Connection to Moonraker lost"))
+                await self._close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    async def _close(self):
+        if self.websocket is not None:
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+            self.websocket = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class PrinterTarget:
+    """One printer served by this host: its input devices, key mapping, delivery queue
+    and connection to its own Moonraker"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.name: Optional[str] = config.get("name")
+        self.logger = logger.getChild(self.name) if self.name else logger
+        self.transport = config.get("transport", MOONRAKER_TRANSPORT)
+        self.url = config.get("url", MOONRAKER_URL)
+        self.ws_url = config.get("ws_url", MOONRAKER_WS_URL)
+        self.uds_path = config.get("uds_path", MOONRAKER_UDS_PATH)
+        self.devices: List[str] = config.get("devices", INPUT_DEVICES)
+        self.scan_code_mapping = dict(SCAN_CODE_MAPPING)
+        self.scan_code_mapping.update(config.get("scan_code_mapping", {}))
+
+        # Debounce state tracking
+        self.last_key_time: Dict[str, float] = {}
+        # Knob spin tracking, key -> (time of last tick, ticks in the current spin)
+        self.knob_spin: Dict[str, Tuple[float, int]] = {}
+
+        self.queue: Optional[DeliveryQueue] = None
+        self.moonraker = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.tasks: List[asyncio.Task] = []
+
+    def matches(self, device: "evdev.InputDevice") -> bool:
+        """Whether an input device belongs to this printer"""
+        if self.devices:
+            return any(
+                fnmatch.fnmatch(device.name, pattern) or fnmatch.fnmatch(device.path, pattern)
+                # Symlinks such as /dev/input/by-path/... resolve to the event node
+                or any(os.path.realpath(path) == device.path for path in glob.glob(pattern))
+                for pattern in self.devices
+            )
+        return self._auto_select(device)
+
+    def _auto_select(self, device: "evdev.InputDevice") -> bool:
+        """Without a device list, take devices with numpad keys recognised as numpads"""
+        keys = device.capabilities().get(ecodes.EV_KEY, [])
+        if not any(code in keys for code in (ecodes.KEY_KP1, ecodes.KEY_KPENTER, ecodes.KEY_VOLUMEUP)):
+            return False
+        ids = (device.info.vendor, device.info.product)
+        description = f"{device.path} ({device.name}, {ids[0]:04x}:{ids[1]:04x})"
+        if ids in AUTO_DEVICE_IDS or any(
+                fnmatch.fnmatch(device.name.lower(), pattern) for pattern in AUTO_DEVICE_NAMES):
+            self.logger.info(
+                f"Auto-selected input device {description}, set INPUT_DEVICES to choose explicitly"
+            )
+            return True
+        self.logger.info(
+            f"Ignoring input device {description}: it has numpad keys but is not a known "
+            f"numpad, add it to INPUT_DEVICES or AUTO_DEVICE_NAMES to use it"
+        )
+        return False
+
+    def get_key_name(self, scan_code: int, original_name: str) -> str:
+        """Get mapped key name from scan code or fallback to original with key_ prefix"""
+        # First check if we have a specific mapping for this scan code
+        if scan_code in self.scan_code_mapping:
+            return self.scan_code_mapping[scan_code]
+
+        # If no mapping exists, fallback to adding key_ prefix to original name
+        return f"key_{original_name}"
+
+    def should_process_key(self, key_name: str, current_time: float) -> bool:
+        """Check if enough time has passed since the last key press"""
+        last_time = self.last_key_time.get(key_name, 0)
+        debounce_time = get_debounce_time(key_name)
+        time_diff = current_time - last_time
+
+        if time_diff >= debounce_time:
+            self.last_key_time[key_name] = current_time
+            self.logger.debug(f"Processing key {key_name}: time since last press = {time_diff*1000:.1f}ms")
+            return True
+
+        self.logger.debug(f"Debounced key {key_name}: time since last press = {time_diff*1000:.1f}ms < {debounce_time*1000:.1f}ms")
+        return False
 
-def on_key_event(e):
-    """Handle key events - only process key down events with debounce"""
-    # Only process key down events
-    if e.event_type == 'down':
+    def get_knob_rate(self, key_name: str, current_time: float) -> float:
+        """Get the step rate for a knob tick, growing while the knob keeps spinning"""
+        last_time, streak = self.knob_spin.get(key_name, (0., 0))
+        streak = streak + 1 if current_time - last_time <= KNOB_SPIN_WINDOW else 1
+        self.knob_spin[key_name] = (current_time, streak)
+        return min(1. + (streak - 1) * KNOB_ACCEL_STEP, KNOB_MAX_RATE)
+
+    def on_key_down(self, scan_code: int, original_name: str):
+        """Handle key down events with debounce"""
         current_time = time.time()
-        key_name = get_key_name(e.scan_code, e.name)
+        key_name = self.get_key_name(scan_code, original_name)
 
         # Check debounce
-        if not should_process_key(key_name, current_time):
-            logger.debug(f"Debounced key event: {key_name}")
+        if not self.should_process_key(key_name, current_time):
+            self.logger.debug(f"Debounced key event: {key_name}")
             return
 
         event_data = {
             "key": key_name,
-            "scan_code": e.scan_code,
-            "event_type": e.event_type,
+            "scan_code": scan_code,
+            "event_type": "down",
             "time": current_time
         }
+        if key_name in KNOB_KEYS:
+            event_data["ticks"] = 1
+            event_data["rate"] = self.get_knob_rate(key_name, current_time)
+
+        self.logger.info(f"Key down event detected: {event_data}")
+        self.queue.put(event_data)
+
+    def get_delivery_stats(self) -> Dict[str, Any]:
+        """Delivery queue counters, reported to Moonraker with every heartbeat"""
+        if self.queue is None:
+            return {}
+        return {
+            "queued": len(self.queue),
+            "merged": self.queue.merged,
+            "dropped": self.queue.dropped,
+            "expired": self.queue.expired
+        }
+
+    def describe(self) -> str:
+        if uses_rpc_transport(self.transport):
+            where = self.uds_path if self.transport == "unix" else self.ws_url
+            return f"{self.transport} {where}"
+        return f"http {self.url}"
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Create the delivery queue and connection, and start delivering"""
+        self.queue = DeliveryQueue(SEND_QUEUE_SIZE, self.logger)
+        # Sends happen on a single worker thread per printer so they stay in order
+        # and never block the input readers or the other printers
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        if uses_rpc_transport(self.transport):
+            self.moonraker = MoonrakerRPC(self)
+        else:
+            if self.transport == "websocket":
+                self.logger.warning("websockets not installed, falling back to http transport")
+            self.moonraker = HttpMoonraker(self)
+        self.tasks = [loop.create_task(self.moonraker.run()), loop.create_task(sender_loop(self))]
+
+    async def stop(self):
+        """Stop delivering and close the connection"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+async def sender_loop(target: PrinterTarget):
+    """Deliver queued events in order, holding them while Moonraker is unavailable"""
+    queue, moonraker, log = target.queue, target.moonraker, target.logger
+    while True:
+        event_data = await queue.get()
+        if not moonraker.ready.is_set():
+            queue.requeue(event_data)
+            log.warning(f"Moonraker not ready, holding {len(queue)} events")
+            await moonraker.ready.wait()
+            expired = queue.expire(time.time())
+            log.info(f"Moonraker ready, replaying {len(queue)} held events ({expired} expired)")
+            continue
+        if not await moonraker.send_event(event_data):
+            queue.requeue(event_data)
+
+def get_evdev_key_name(code: int) -> str:
+    """Get a keyboard-package style name (e.g. 'kp1') for an evdev key code"""
+    name = ecodes.KEY.get(code, str(code))
+    if isinstance(name, (list, tuple)):
+        name = name[0]
+    return name[4:].lower() if name.startswith("KEY_") else name.lower()
+
+class EvdevInput:
+    """Reads key events from the configured input devices only, with hot-plug support.
+    Each device is routed to the first printer whose devices match it."""
+
+    def __init__(self, targets: List[PrinterTarget]):
+        self.targets = targets
+        self.devices: Dict[str, "evdev.InputDevice"] = {}
+        # Devices no printer wants, path -> ctime of the device node. Not probed again
+        # until the node goes away or is recreated (unplugged and replugged).
+        self.rejected: Dict[str, float] = {}
+
+    def _target_for(self, device: "evdev.InputDevice") -> Optional[PrinterTarget]:
+        return next((target for target in self.targets if target.matches(device)), None)
+
+    def _node_ctime(self, path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_ctime
+        except OSError:
+            return None
+
+    def _open_new_devices(self) -> List[Tuple["evdev.InputDevice", PrinterTarget]]:
+        opened = []
+        paths = evdev.list_devices()
+        for path in set(self.rejected) - set(paths):
+            del self.rejected[path]
+        for path in paths:
+            if path in self.devices:
+                continue
+            ctime = self._node_ctime(path)
+            if path in self.rejected and self.rejected[path] == ctime:
+                continue
+            try:
+                device = evdev.InputDevice(path)
+            except OSError:
+                continue
+            target = self._target_for(device)
+            if target is None:
+                device.close()
+                if ctime is not None:
+                    self.rejected[path] = ctime
+                continue
+            self.rejected.pop(path, None)
+            if GRAB_DEVICES:
+                try:
+                    device.grab()
+                except OSError as e:
+                    target.logger.warning(f"Could not grab {device.path} ({device.name}): {e}")
+            self.devices[path] = device
+            opened.append((device, target))
+            target.logger.info(f"Listening on input device {device.path} ({device.name})")
+        return opened
+
+    async def _read_device(self, device: "evdev.InputDevice", target: PrinterTarget):
+        try:
+            async for event in device.async_read_loop():
+                # Only process key down events (value 1), not release (0). Repeats (2)
+                # only count for the knob keys, where holding the key keeps adjusting.
+                if event.type != ecodes.EV_KEY:
+                    continue
+                name = get_evdev_key_name(event.code)
+                if event.value == 1 or (event.value == 2 and target.get_key_name(event.code, name) in KNOB_KEYS):
+                    target.on_key_down(event.code, name)
+        except OSError as e:
+            target.logger.info(f"Input device {device.path} removed: {e}")
+        finally:
+            self.devices.pop(device.path, None)
+            try:
+                device.close()
+            except OSError:
+                pass
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            for device, target in self._open_new_devices():
+                loop.create_task(self._read_device(device, target))
+            await asyncio.sleep(HOTPLUG_SCAN_INTERVAL)
+
+async def run_keyboard_input(on_key: Callable[[int, str], None]):
+    """Fallback backend using the keyboard package's global hook"""
+    import keyboard
+    loop = asyncio.get_running_loop()
+
+    def on_key_event(e):
+        # Only process key down events
+        if e.event_type == 'down':
+            loop.call_soon_threadsafe(on_key, e.scan_code, e.name)
 
-        logger.info(f"Key down event detected: {event_data}")
-        send_to_moonraker(event_data)
+    # Unhook any existing hooks to prevent duplicate event listeners
+    keyboard.unhook_all()
+
+    # Hook the key event handler
+    keyboard.hook(on_key_event)
+    try:
+        await loop.create_future()
+    finally:
+        keyboard.unhook_all()
+
+def build_targets() -> List[PrinterTarget]:
+    """Printers served by this host, a single one unless PRINTERS is set"""
+    return [PrinterTarget(config) for config in (PRINTERS or [{}])]
+
+async def run_input():
+    loop = asyncio.get_running_loop()
+    targets = build_targets()
+    for target in targets:
+        target.start(loop)
+
+    try:
+        if INPUT_BACKEND == "evdev" and evdev is not None:
+            logger.info("Using evdev input backend")
+            await EvdevInput(targets).run()
+        else:
+            if INPUT_BACKEND == "evdev":
+                logger.warning("evdev not installed, falling back to keyboard input backend")
+            if len(targets) > 1:
+                logger.warning("Keyboard input backend can't tell devices apart, "
+                               f"all keys go to {targets[0].name}")
+            logger.info("Using keyboard input backend")
+            await run_keyboard_input(targets[0].on_key_down)
+    finally:
+        for target in targets:
+            await target.stop()
 
 def main():
+    setup_logging()
     logger.info("Numpad Listener Service started")
     logger.info(f"Using scan code mapping for {len(SCAN_CODE_MAPPING)} special keys")
     logger.info("Debounce configuration:")
     for key, value in DEBOUNCE_CONFIG.items():
         logger.info(f"- {key}: {value}ms")
+    for target in build_targets():
+        logger.info(f"Printer {target.name or 'default'}: Moonraker over {target.describe()}, "
+                    f"devices: {target.devices or 'any numpad'}")
 
     while True:
         try:
-            # Unhook any existing hooks to prevent duplicate event listeners
-            keyboard.unhook_all()
-            
-            # Hook the key event handler
-            keyboard.hook(on_key_event)
-
             logger.info("Listening for key down events...")
-            keyboard.wait()
+            asyncio.run(run_input())
         except Exception as e:
             logger.error(f"Error in keyboard event listener: {e}")
             logger.info("Attempting to restart keyboard listener in 5 seconds...")
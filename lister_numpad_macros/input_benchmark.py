@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Benchmark the numpad_event_service input pipeline without a printer.
+
+Injects key presses into numpad_event_service through a stub backend (calls
+the service's key handler directly) or a uinput virtual keyboard read by the
+evdev backend, and delivers them to a local stand-in Moonraker over the chosen
+transport. Reports capture-to-delivery latency, the debounce drop rate and
+delivered events per second for a steady stream and for a burst.
+
+Examples:
+    python3 input_benchmark.py
+    python3 input_benchmark.py --transport http --events 500 --interval 0.01
+    python3 input_benchmark.py --transport unix --handler-delay 0.02 --burst 200
+    python3 input_benchmark.py --no-debounce --burst 1000
+    sudo python3 input_benchmark.py --backend uinput --transport websocket
+"""
+import argparse
+import asyncio
+import bisect
+import importlib.util
+import json
+import logging
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from macros_benchmark import percentile
+
+BASE_DIR = Path(__file__).resolve().parent
+SERVICE_PATH = BASE_DIR / "extras" / "numpad_event_service.py"
+
+TRANSPORTS = ["http", "unix", "websocket"]
+BACKENDS = ["stub", "uinput"]
+UINPUT_NAME = "numpad-input-benchmark"
+DEFAULT_KEYS = "key_1,key_up,key_up,key_2,key_down,key_3,key_up,key_enter"
+
+
+class StandInMoonraker:
+    """Local Moonraker stand-in that answers the service and records event arrivals"""
+    def __init__(self, handler_delay: float) -> None:
+        self.handler_delay = handler_delay
+        self.arrivals: List[Tuple[float, Dict[str, Any]]] = []
+        self.lock = threading.Lock()
+        self.http_server: Optional[ThreadingHTTPServer] = None
+        self.aio_server: Any = None
+
+    def record(self, event: Dict[str, Any]) -> None:
+        arrival = time.time()
+        with self.lock:
+            self.arrivals.append((arrival, event))
+
+    def take_arrivals(self) -> List[Tuple[float, Dict[str, Any]]]:
+        with self.lock:
+            arrivals, self.arrivals = self.arrivals, []
+        return arrivals
+
+    def result_for(self, method: str, params: Any) -> Any:
+        if method == "server.info":
+            return {'klippy_connected': True, 'klippy_state': 'ready'}
+        if method == "server.numpad.status":
+            return {'status': {}}
+        if method == "server.numpad.event":
+            self.record(params)
+            return {'status': 'ok'}
+        return {'status': 'ok'}
+
+    async def _handle_rpc(self, data: str) -> str:
+        message = json.loads(data)
+        result = self.result_for(message['method'], message.get('params'))
+        if message['method'] == "server.numpad.event" and self.handler_delay:
+            await asyncio.sleep(self.handler_delay)
+        return json.dumps({'jsonrpc': '2.0', 'id': message['id'], 'result': result})
+
+    async def _handle_unix(self, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                data = await reader.readuntil(b"\x03")
+                writer.write((await self._handle_rpc(data[:-1].decode())).encode() + b"\x03")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_websocket(self, websocket, *args) -> None:
+        async for data in websocket:
+            await websocket.send(await self._handle_rpc(data))
+
+    def _start_http(self) -> str:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _reply(self, result: Any) -> None:
+                body = json.dumps({'result': result}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                self._reply(standin.result_for(self.path.strip('/').replace('/', '.'), {}))
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get('Content-Length', 0))
+                params = json.loads(self.rfile.read(length) or b'{}')
+                result = standin.result_for(self.path.strip('/').replace('/', '.'), params)
+                if self.path == "/server/numpad/event" and standin.handler_delay:
+                    time.sleep(standin.handler_delay)
+                self._reply(result)
+
+        self.http_server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.http_server.server_address[1]}"
+
+    async def start(self, transport: str, tmpdir: str) -> Dict[str, Any]:
+        """Start serving, returns the PRINTERS entry that points the service here"""
+        if transport == "http":
+            return {'name': 'bench', 'transport': 'http', 'url': self._start_http()}
+        if transport == "unix":
+            path = str(Path(tmpdir) / "moonraker.sock")
+            self.aio_server = await asyncio.start_unix_server(self._handle_unix, path)
+            return {'name': 'bench', 'transport': 'unix', 'uds_path': path}
+        import websockets
+        self.aio_server = await websockets.serve(self._handle_websocket, '127.0.0.1', 0)
+        port = list(self.aio_server.sockets)[0].getsockname()[1]
+        return {'name': 'bench', 'transport': 'websocket',
+                'ws_url': f"ws://127.0.0.1:{port}/websocket"}
+
+    async def stop(self) -> None:
+        if self.http_server is not None:
+            self.http_server.shutdown()
+        if self.aio_server is not None:
+            self.aio_server.close()
+            await self.aio_server.wait_closed()
+
+
+class StubInjector:
+    """Feeds presses straight into the service's key handler"""
+    def __init__(self, module, target) -> None:
+        self.target = target
+
+    async def start(self) -> None:
+        pass
+
+    def press(self, scan_code: int) -> None:
+        self.target.on_key_down(scan_code, "bench")
+
+    async def stop(self) -> None:
+        pass
+
+
+class UInputInjector:
+    """Presses keys on a uinput virtual keyboard read by the service's evdev backend"""
+    def __init__(self, module, target) -> None:
+        if module.evdev is None:
+            raise SystemExit("the uinput backend needs the evdev package")
+        self.module = module
+        self.target = target
+        self.ui = module.evdev.UInput(
+            {module.ecodes.EV_KEY: sorted(module.SCAN_CODE_MAPPING)}, name=UINPUT_NAME
+        )
+        self.input = module.EvdevInput([target])
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.target.devices = [UINPUT_NAME]
+        self.task = asyncio.get_running_loop().create_task(self.input.run())
+        deadline = time.monotonic() + self.module.HOTPLUG_SCAN_INTERVAL + 5.
+        while not any(d.name == UINPUT_NAME for d in self.input.devices.values()):
+            if time.monotonic() > deadline:
+                raise SystemExit("evdev backend did not open the uinput device")
+            await asyncio.sleep(0.05)
+
+    def press(self, scan_code: int) -> None:
+        ecodes = self.module.ecodes
+        self.ui.write(ecodes.EV_KEY, scan_code, 1)
+        self.ui.write(ecodes.EV_KEY, scan_code, 0)
+        self.ui.syn()
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+        self.ui.close()
+
+
+def load_service_module():
+    spec = importlib.util.spec_from_file_location("numpad_event_service", SERVICE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.logger.propagate = False
+    module.logger.addHandler(logging.NullHandler())
+    return module
+
+
+def scan_codes_for(module, keys: List[str]) -> List[int]:
+    codes: Dict[str, int] = {}
+    for code, name in module.SCAN_CODE_MAPPING.items():
+        codes.setdefault(name, code)
+    missing = [key for key in keys if key not in codes]
+    if missing:
+        raise SystemExit(f"no scan code for keys: {', '.join(missing)}")
+    return [codes[key] for key in keys]
+
+
+async def drain(standin: StandInMoonraker, target, timeout: float) -> None:
+    """Wait until the delivery queue is empty and arrivals stopped"""
+    deadline = time.monotonic() + timeout
+    last_count = -1
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        count = len(standin.arrivals)
+        if not len(target.queue) and count == last_count:
+            return
+        last_count = count
+
+
+async def run_phase(name: str, standin: StandInMoonraker, target, injector,
+                    codes: List[int], count: int, interval: float, args) -> Dict[str, Any]:
+    target.last_key_time.clear()
+    target.knob_spin.clear()
+    target.debounced = 0
+    queue = target.queue
+    merged, dropped = queue.merged, queue.dropped
+    injected: List[float] = []
+
+    start = time.time()
+    for i in range(count):
+        injected.append(time.time())
+        injector.press(codes[i % len(codes)])
+        await asyncio.sleep(interval)
+    await drain(standin, target, args.drain_timeout)
+    arrivals = standin.take_arrivals()
+    debounced = target.debounced
+
+    latencies: List[float] = []
+    ticks = 0
+    for arrival, event in arrivals:
+        # Latency from the injected press that produced the event's first tick
+        idx = bisect.bisect_right(injected, event['time']) - 1
+        if idx >= 0:
+            latencies.append((arrival - injected[idx]) * 1000.)
+        ticks += int(event.get('ticks', 1))
+    end = arrivals[-1][0] if arrivals else start
+    elapsed = end - start
+
+    return {
+        'phase': name,
+        'transport': args.transport,
+        'backend': args.backend,
+        'injected': count,
+        'debounced': debounced,
+        'debounce_drop_rate': round(100. * debounced / count, 1) if count else 0.,
+        'delivered_events': len(arrivals),
+        'delivered_ticks': ticks,
+        'merged': queue.merged - merged,
+        'queue_dropped': queue.dropped - dropped,
+        'events_per_second': round(len(arrivals) / elapsed, 1) if elapsed > 0 else 0.,
+        'latency': {
+            'mean': round(statistics.mean(latencies), 2) if latencies else 0.,
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(max(latencies), 2) if latencies else 0.
+        }
+    }
+
+
+def count_debounced(target) -> None:
+    """Count presses the service's debounce rejects"""
+    should_process_key = target.should_process_key
+    target.debounced = 0
+
+    def counting(key_name: str, current_time: float) -> bool:
+        if should_process_key(key_name, current_time):
+            return True
+        target.debounced += 1
+        return False
+    target.should_process_key = counting
+
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    module = load_service_module()
+    if args.no_debounce:
+        module.DEBOUNCE_CONFIG = {'default': 0}
+    codes = scan_codes_for(module, [k.strip() for k in args.keys.split(',') if k.strip()])
+    loop = asyncio.get_running_loop()
+    standin = StandInMoonraker(args.handler_delay)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        target = module.PrinterTarget(await standin.start(args.transport, tmpdir))
+        count_debounced(target)
+        target.start(loop)
+        await asyncio.wait_for(target.moonraker.ready.wait(), 10.)
+        injector = (UInputInjector if args.backend == "uinput" else StubInjector)(module, target)
+        await injector.start()
+        try:
+            results = [
+                await run_phase('steady', standin, target, injector, codes,
+                                args.events, args.interval, args),
+                await run_phase('burst', standin, target, injector, codes,
+                                args.burst, 0., args)
+            ]
+        finally:
+            await injector.stop()
+            await target.stop()
+            await standin.stop()
+    return results
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    latency = result['latency']
+    print(f"\n== {result['phase']} ({result['backend']} -> {result['transport']}) ==")
+    print(f"injected: {result['injected']}  debounced: {result['debounced']} "
+          f"({result['debounce_drop_rate']}%)  delivered: {result['delivered_events']} events, "
+          f"{result['delivered_ticks']} ticks  merged: {result['merged']}  "
+          f"queue dropped: {result['queue_dropped']}")
+    print(f"events/s: {result['events_per_second']}  latency ms  mean: {latency['mean']}  "
+          f"p50: {latency['p50']}  p95: {latency['p95']}  p99: {latency['p99']}  "
+          f"max: {latency['max']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the numpad_event_service input pipeline")
+    parser.add_argument('--transport', choices=TRANSPORTS, default='unix')
+    parser.add_argument('--backend', choices=BACKENDS, default='stub')
+    parser.add_argument('--events', type=int, default=200, help="presses in the steady phase")
+    parser.add_argument('--interval', type=float, default=0.05,
+                        help="seconds between steady presses")
+    parser.add_argument('--burst', type=int, default=100, help="back-to-back presses in the burst")
+    parser.add_argument('--keys', default=DEFAULT_KEYS, help="comma separated key pattern to cycle")
+    parser.add_argument('--no-debounce', action='store_true',
+                        help="disable debounce to measure raw burst throughput")
+    parser.add_argument('--handler-delay', type=float, default=0.,
+                        help="seconds the stand-in Moonraker takes per event")
+    parser.add_argument('--drain-timeout', type=float, default=10.,
+                        help="seconds to wait for queued events after injecting")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print_report(result)
+
+
+if __name__ == "__main__":
+    main()
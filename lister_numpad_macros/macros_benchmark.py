@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""Benchmark the numpad_macros Moonraker component without a printer.
+
+Drives NumpadMacros with synthetic or recorded key streams against
+in-process stand-ins for Moonraker and klippy_apis, and reports events per
+second, per-key latency up to the handler's return and to the first G-code
+sent, the component's per-mode stage timings and Klippy round-trips per event
+for each mode. The estop_m190 mode presses the e-stop key while an M190 holds
+the G-code queue, to measure how long the emergency stop takes to get through.
+
+Examples:
+    python3 macros_benchmark.py
+    python3 macros_benchmark.py --gcode-delay 0.05 --query-latency 0.01
+    python3 macros_benchmark.py --mode printing_low --events 200 --interval 0
+    python3 macros_benchmark.py --replay keys.jsonl --set knob_coalesce_window=0
+    python3 macros_benchmark.py --mode estop_m190 --m190-time 5 --busy-slice 0.1
+"""
+import argparse
+import asyncio
+import configparser
+import importlib.util
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+COMPONENT_PATH = BASE_DIR / "components" / "numpad_macros.py"
+DEFAULT_CONFIG = BASE_DIR.parent / "lister_moonraker.cfg"
+
+MODES = ["idle", "printing_low", "printing_high", "probing", "estop_m190"]
+
+
+class ServerError(Exception):
+    def __init__(self, message: str, status_code: int = 400) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeTimer:
+    """Stand-in for Moonraker's FlexTimer, never fires"""
+    def __init__(self) -> None:
+        self.running = False
+
+    def start(self, delay: float = 0.) -> None:
+        self.running = True
+
+    def stop(self) -> None:
+        self.running = False
+
+    def is_running(self) -> bool:
+        return self.running
+
+
+class FakeEventLoop:
+    """Subset of Moonraker's EventLoop used by the component"""
+    def __init__(self) -> None:
+        self.aioloop = asyncio.get_event_loop()
+        self.create_task = self.aioloop.create_task
+
+    def _run(self, callback: Callable, *args) -> None:
+        ret = callback(*args)
+        if asyncio.iscoroutine(ret):
+            self.aioloop.create_task(ret)
+
+    def register_callback(self, callback: Callable, *args) -> None:
+        self.aioloop.call_soon(self._run, callback, *args)
+
+    def delay_callback(self, delay: float, callback: Callable, *args) -> asyncio.TimerHandle:
+        return self.aioloop.call_later(delay, self._run, callback, *args)
+
+    def register_timer(self, callback: Callable) -> FakeTimer:
+        return FakeTimer()
+
+
+class FakeKlippyAPI:
+    """klippy_apis stand-in with a serialized G-code queue and query latency.
+
+    A running script keeps Klippy busy in slices of busy_slice seconds, an
+    emergency stop waits for the current slice and aborts the script"""
+    def __init__(self, gcode_delay: float, query_latency: float,
+                 busy_slice: float = 0.05, m190_time: float = 2.0) -> None:
+        self.gcode_delay = gcode_delay
+        self.query_latency = query_latency
+        self.busy_slice = busy_slice
+        # Seconds scripts starting with these commands hold the G-code queue
+        self.slow_gcode: Dict[str, float] = {'M190': m190_time}
+        self.gcode_lock = asyncio.Lock()
+        self._slice_end = 0.
+        self._abort = False
+        self.round_trips = 0
+        self.gcode_lines = 0
+        self.aborted = 0
+        self.status: Dict[str, Dict[str, Any]] = {}
+        # Called with each script as it is submitted, before the queue delay
+        self.on_gcode: Optional[Callable[[str], None]] = None
+        self.set_mode("idle")
+
+    def set_mode(self, mode: str) -> None:
+        z = 0.2 if mode in ("printing_low", "probing") else 5.0
+        self.status = {
+            'print_stats': {'state': 'printing' if mode.startswith('printing') else 'standby'},
+            'toolhead': {'position': [100., 100., z, 0.]},
+            'gcode_move': {'speed_factor': 1.0},
+            'save_variables': {'variables': {'finetune_z_nozzle_offset': 0.0}},
+            'gcode_macro CHECK_PROBE_STATUS': {'monitor_active': mode == 'probing'},
+        }
+
+    async def run_gcode(self, script: str) -> str:
+        self.round_trips += 1
+        self.gcode_lines += len(script.splitlines())
+        if self.on_gcode is not None:
+            self.on_gcode(script)
+        loop = asyncio.get_event_loop()
+        command = script.split(None, 1)[0].upper() if script.strip() else ''
+        remaining = self.slow_gcode.get(command, self.gcode_delay)
+        async with self.gcode_lock:
+            self._abort = False
+            try:
+                while remaining > 0.:
+                    step = min(remaining, self.busy_slice) if self.busy_slice > 0. else remaining
+                    self._slice_end = loop.time() + step
+                    await asyncio.sleep(step)
+                    remaining -= step
+                    if self._abort:
+                        self.aborted += 1
+                        raise ServerError("Klippy shutdown", 503)
+            finally:
+                self._slice_end = 0.
+        return "ok"
+
+    async def query_objects(self, objects: Dict[str, Any]) -> Dict[str, Any]:
+        self.round_trips += 1
+        await asyncio.sleep(self.query_latency)
+        return {obj: dict(self.status.get(obj, {})) for obj in objects}
+
+    async def subscribe_objects(
+            self, objects: Dict[str, Any], callback: Optional[Callable] = None
+    ) -> Dict[str, Any]:
+        self.round_trips += 1
+        await asyncio.sleep(self.query_latency)
+        return {obj: dict(self.status.get(obj, {})) for obj in objects}
+
+    async def emergency_stop(self) -> str:
+        self.round_trips += 1
+        # Klippy only gets to the request once the running script yields
+        busy = max(0., self._slice_end - asyncio.get_event_loop().time())
+        await asyncio.sleep(self.query_latency + busy)
+        if self.gcode_lock.locked():
+            self._abort = True
+        return "ok"
+
+
+class FakeServer:
+    """Subset of Moonraker's Server used by the component"""
+    error = ServerError
+
+    def __init__(self, kapis: FakeKlippyAPI) -> None:
+        self.event_loop = FakeEventLoop()
+        self.kapis = kapis
+        self.endpoints: Dict[str, Callable] = {}
+        self.events: Dict[str, List[Callable]] = {}
+        self.notifications = 0
+
+    def get_event_loop(self) -> FakeEventLoop:
+        return self.event_loop
+
+    def get_app_args(self) -> Dict[str, Any]:
+        return {'data_path': '/tmp/printer_data'}
+
+    def lookup_component(self, name: str) -> Any:
+        if name == 'klippy_apis':
+            return self.kapis
+        raise ServerError(f"Component {name} not found")
+
+    def register_endpoint(self, path: str, methods: List[str], callback: Callable) -> None:
+        self.endpoints[path] = callback
+
+    def register_notification(self, name: str) -> None:
+        pass
+
+    def register_event_handler(self, event: str, callback: Callable) -> None:
+        self.events.setdefault(event, []).append(callback)
+
+    def send_event(self, event: str, *args) -> asyncio.Future:
+        self.notifications += 1
+        fut = self.event_loop.aioloop.create_future()
+        fut.set_result(None)
+        return fut
+
+
+class FakeConfig:
+    """Subset of Moonraker's ConfigHelper backed by a plain dict"""
+    def __init__(self, server: FakeServer, options: Dict[str, str]) -> None:
+        self.server = server
+        self.options = options
+
+    def get_server(self) -> FakeServer:
+        return self.server
+
+    def get_name(self) -> str:
+        return "numpad_macros"
+
+    def has_option(self, option: str) -> bool:
+        return option in self.options
+
+    def get(self, option: str, default: Any = None) -> Any:
+        return self.options.get(option, default)
+
+    def getboolean(self, option: str, default: bool = False) -> bool:
+        if option not in self.options:
+            return default
+        return self.options[option].lower() in ('true', '1', 'yes', 'on')
+
+    def getint(self, option: str, default: int = 0, **kwargs) -> int:
+        return int(self.options[option]) if option in self.options else default
+
+    def getfloat(self, option: str, default: float = 0., **kwargs) -> float:
+        return float(self.options[option]) if option in self.options else default
+
+    def getdict(self, option: str, default: Any = None) -> Any:
+        return default
+
+
+class FakeWebRequest:
+    def __init__(self, args: Dict[str, Any]) -> None:
+        self.args = args
+
+    def get_args(self) -> Dict[str, Any]:
+        return self.args
+
+    def get_int(self, key: str, default: Any = None) -> Any:
+        return int(self.args[key]) if key in self.args else default
+
+
+def load_component_module():
+    spec = importlib.util.spec_from_file_location("numpad_macros", COMPONENT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # E-stop warnings would flood the report
+    component_logger = logging.getLogger("moonraker.numpad_macros")
+    component_logger.propagate = False
+    component_logger.addHandler(logging.NullHandler())
+    return module
+
+
+def load_options(path: Optional[Path], overrides: List[str]) -> Dict[str, str]:
+    options: Dict[str, str] = {}
+    if path is not None and path.is_file():
+        parser = configparser.ConfigParser(inline_comment_prefixes=('#',))
+        parser.read(path)
+        if parser.has_section('numpad_macros'):
+            options.update(parser['numpad_macros'])
+    options['debug_log'] = 'False'
+    for item in overrides:
+        name, _, value = item.partition('=')
+        options[name.strip()] = value.strip()
+    return options
+
+
+def synthetic_stream(mode: str, count: int, interval: float) -> List[Tuple[float, str]]:
+    """Build (delay, key) pairs typical for a mode"""
+    if mode == 'idle':
+        pattern = ['key_up', 'key_up', 'key_down', 'key_1', 'key_enter']
+    elif mode == 'probing':
+        pattern = ['key_down', 'key_down', 'key_down', 'key_up']
+    elif mode == 'estop_m190':
+        pattern = ['key_dot']
+    else:
+        pattern = ['key_up', 'key_up', 'key_up', 'key_down']
+    return [(interval, pattern[i % len(pattern)]) for i in range(count)]
+
+
+def recorded_stream(path: Path) -> List[Tuple[float, str]]:
+    """Read JSON lines with 'key' and optional 'time' (capture timestamp)"""
+    stream: List[Tuple[float, str]] = []
+    last_time: Optional[float] = None
+    with path.open() as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            event_time = event.get('time')
+            delay = 0.
+            if event_time is not None and last_time is not None:
+                delay = max(0., float(event_time) - last_time)
+            if event_time is not None:
+                last_time = float(event_time)
+            stream.append((delay, event['key']))
+    return stream
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100. * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def run_mode(module, options: Dict[str, str], mode: str,
+                   stream: List[Tuple[float, str]], args) -> Dict[str, Any]:
+    kapis = FakeKlippyAPI(args.gcode_delay, args.query_latency, args.busy_slice, args.m190_time)
+    kapis.set_mode(mode)
+    server = FakeServer(kapis)
+    component = module.NumpadMacros(FakeConfig(server, options))
+    for callback in server.events.get("server:klippy_ready", []):
+        await callback()
+
+    handler = server.endpoints["/server/numpad/event"]
+    setup_trips = kapis.round_trips
+    latencies: Dict[str, List[float]] = {}
+    # Time from injecting a key to the first G-code sent after it, this includes
+    # coalescing windows and background jobs the handler doesn't wait for
+    gcode_latencies: Dict[str, List[float]] = {}
+    pending: List[Tuple[str, float]] = []
+
+    def on_gcode(script: str) -> None:
+        now = time.perf_counter()
+        for key, sent in pending:
+            gcode_latencies.setdefault(key, []).append((now - sent) * 1000.)
+        pending.clear()
+
+    kapis.on_gcode = on_gcode
+    errors = 0
+
+    start = time.perf_counter()
+    for delay, key in stream:
+        if delay:
+            await asyncio.sleep(delay)
+        blocking = None
+        if mode == 'estop_m190':
+            # Press the key part way into a slice of a running M190
+            pending.clear()
+            blocking = asyncio.ensure_future(kapis.run_gcode("M190 S60"))
+            await asyncio.sleep(args.busy_slice * 1.5)
+        request = FakeWebRequest({'key': key, 'event_type': 'down', 'time': time.time()})
+        t0 = time.perf_counter()
+        pending.append((key, t0))
+        try:
+            await handler(request)
+        except Exception:
+            errors += 1
+        latencies.setdefault(key, []).append((time.perf_counter() - t0) * 1000.)
+        if blocking is not None:
+            # Ends early once the e-stop aborts it, otherwise runs its full time
+            await asyncio.gather(blocking, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    # Let coalescing windows and background jobs finish before counting
+    await asyncio.sleep(component.knob_coalesce_window + args.gcode_delay * 4 + 0.05)
+    while component._job_tasks:
+        await asyncio.sleep(0.01)
+    for handle in (component._z_offset_save_handle, component._knob_flush_handle):
+        if handle is not None:
+            handle.cancel()
+
+    events = len(stream)
+    trips = kapis.round_trips - setup_trips
+    return {
+        'mode': mode,
+        'events': events,
+        'errors': errors,
+        'events_per_second': round(events / elapsed, 1) if elapsed else 0.,
+        'round_trips_per_event': round(trips / events, 2) if events else 0.,
+        'gcode_lines_per_event': round(kapis.gcode_lines / events, 2) if events else 0.,
+        'aborted_scripts': kapis.aborted,
+        'keys': {
+            key: {
+                'count': len(values),
+                'mean': round(statistics.mean(values), 2),
+                'p50': round(percentile(values, 50), 2),
+                'p95': round(percentile(values, 95), 2),
+                'p99': round(percentile(values, 99), 2),
+                'to_gcode_p50': round(percentile(gcode_latencies.get(key, []), 50), 2),
+                'to_gcode_p95': round(percentile(gcode_latencies.get(key, []), 95), 2)
+            }
+            for key, values in sorted(latencies.items())
+        },
+        'component_metrics': component.get_metrics()['modes']
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\n== {result['mode']} ==")
+    print(f"events: {result['events']}  errors: {result['errors']}  "
+          f"events/s: {result['events_per_second']}  "
+          f"round-trips/event: {result['round_trips_per_event']}  "
+          f"gcode lines/event: {result['gcode_lines_per_event']}  "
+          f"aborted scripts: {result['aborted_scripts']}")
+    print(f"{'key':<16}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}"
+          f"{'gcode p50':>12}{'gcode p95':>12}  (ms)")
+    for key, stats in result['keys'].items():
+        print(f"{key:<16}{stats['count']:>7}{stats['mean']:>10}{stats['p50']:>10}"
+              f"{stats['p95']:>10}{stats['p99']:>10}{stats['to_gcode_p50']:>12}"
+              f"{stats['to_gcode_p95']:>12}")
+    # The handler returns before coalesced knob windows and background jobs send
+    # their G-code, so their cost only shows up in the component's own stages
+    print(f"{'component mode':<16}{'stage':<16}{'count':>7}{'mean':>10}{'p50':>10}"
+          f"{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for mode, stages in sorted(result['component_metrics'].items()):
+        for stage, stats in sorted(stages.items()):
+            print(f"{mode:<16}{stage:<16}{stats['count']:>7}{stats['mean']:>10}{stats['p50']:>10}"
+                  f"{stats['p95']:>10}{stats['p99']:>10}{stats['max']:>10}")
+
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    module = load_component_module()
+    options = load_options(None if args.no_config else Path(args.config), args.set)
+    modes = MODES if args.mode == 'all' else [args.mode]
+    results = []
+    for mode in modes:
+        if args.replay:
+            stream = recorded_stream(Path(args.replay))
+        else:
+            stream = synthetic_stream(mode, args.events, args.interval)
+        results.append(await run_mode(module, options, mode, stream, args))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the numpad_macros component")
+    parser.add_argument('--mode', choices=MODES + ['all'], default='all')
+    parser.add_argument('--events', type=int, default=100, help="synthetic events per mode")
+    parser.add_argument('--interval', type=float, default=0.02,
+                        help="seconds between synthetic events")
+    parser.add_argument('--replay', help="JSON lines file of recorded events to replay")
+    parser.add_argument('--gcode-delay', type=float, default=0.02,
+                        help="seconds each run_gcode waits in the G-code queue")
+    parser.add_argument('--query-latency', type=float, default=0.005,
+                        help="seconds per query/subscribe round-trip")
+    parser.add_argument('--busy-slice', type=float, default=0.05,
+                        help="seconds a running script keeps Klippy from API requests")
+    parser.add_argument('--m190-time', type=float, default=2.0,
+                        help="seconds an M190 holds the G-code queue in the estop_m190 mode")
+    parser.add_argument('--config', default=str(DEFAULT_CONFIG),
+                        help="moonraker config with a [numpad_macros] section")
+    parser.add_argument('--no-config', action='store_true', help="use component defaults")
+    parser.add_argument('--set', action='append', default=[], metavar='OPTION=VALUE',
+                        help="override a [numpad_macros] option")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Tests for numpad_event_service: the delivery queue, knob acceleration and device matching.
+
+Run from the repository root:
+    python3 -m unittest discover -s lister_numpad_macros/tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import input_benchmark  # noqa: E402
+
+service = input_benchmark.load_service_module()
+
+
+def event(key: str, time: float = 0., **fields):
+    return {'key': key, 'event_type': 'down', 'time': time, **fields}
+
+
+class DeliveryQueueMergeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = service.DeliveryQueue(4)
+
+    def test_knob_ticks_merge_into_the_tail(self):
+        self.queue.put(event('key_up', ticks=1, rate=1.))
+        self.queue.put(event('key_up', ticks=1, rate=3.))
+        self.assertEqual(len(self.queue), 1)
+        merged = self.queue.events[0]
+        self.assertEqual(merged['ticks'], 2)
+        # Total steps are kept: 1 * 1.0 + 1 * 3.0 over two ticks
+        self.assertEqual(merged['rate'], 2.)
+        self.assertEqual(self.queue.merged, 1)
+
+    def test_ticks_only_merge_with_the_same_key_at_the_tail(self):
+        self.queue.put(event('key_up', ticks=1))
+        self.queue.put(event('key_down', ticks=1))
+        self.queue.put(event('key_up', ticks=1))
+        self.assertEqual([e['key'] for e in self.queue.events], ['key_up', 'key_down', 'key_up'])
+        self.assertEqual(self.queue.merged, 0)
+
+    def test_other_keys_never_merge(self):
+        self.queue.put(event('key_1'))
+        self.queue.put(event('key_1'))
+        self.assertEqual(len(self.queue), 2)
+
+
+class DeliveryQueueDropTest(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = service.DeliveryQueue(2)
+
+    def test_oldest_event_is_dropped_when_full(self):
+        for key in ('key_1', 'key_2', 'key_3'):
+            self.queue.put(event(key))
+        self.assertEqual([e['key'] for e in self.queue.events], ['key_2', 'key_3'])
+        self.assertEqual(self.queue.dropped, 1)
+
+    def test_protected_keys_are_kept(self):
+        self.queue.put(event('key_dot'))
+        self.queue.put(event('key_1'))
+        self.queue.put(event('key_2'))
+        self.assertEqual([e['key'] for e in self.queue.events], ['key_dot', 'key_2'])
+
+    def test_new_event_is_dropped_when_only_protected_keys_are_queued(self):
+        self.queue.put(event('key_dot'))
+        self.queue.put(event('key_enter'))
+        self.queue.put(event('key_1'))
+        self.assertEqual([e['key'] for e in self.queue.events], ['key_dot', 'key_enter'])
+        self.assertEqual(self.queue.dropped, 1)
+
+    def test_protected_key_is_queued_past_the_limit(self):
+        self.queue.put(event('key_dot'))
+        self.queue.put(event('key_enter'))
+        self.queue.put(event('key_dot'))
+        self.assertEqual(len(self.queue), 3)
+        self.assertEqual(self.queue.dropped, 0)
+
+
+class DeliveryQueueExpiryTest(unittest.TestCase):
+
+    def test_held_events_expire_by_key(self):
+        queue = service.DeliveryQueue(8)
+        now = 100.
+        queue.put(event('key_dot', now - 2.))   # e-stop expires after 1s
+        queue.put(event('key_up', now - 2.))    # knob after 3s
+        queue.put(event('key_1', now - 11.))    # others after 10s
+        queue.put(event('key_2', now - 5.))
+        self.assertEqual(queue.expire(now), 2)
+        self.assertEqual([e['key'] for e in queue.events], ['key_up', 'key_2'])
+        self.assertEqual(queue.expired, 2)
+
+    def test_requeued_event_is_sent_first(self):
+        queue = service.DeliveryQueue(8)
+        queue.put(event('key_1'))
+        queue.requeue(event('key_2'))
+        self.assertEqual([e['key'] for e in queue.events], ['key_2', 'key_1'])
+
+
+class KnobRateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.target = service.PrinterTarget({})
+
+    def test_single_tick_moves_one_step(self):
+        self.assertEqual(self.target.get_knob_rate('key_up', 10.), 1.)
+
+    def test_rate_grows_while_spinning(self):
+        rates = [self.target.get_knob_rate('key_up', 10. + i * 0.05) for i in range(4)]
+        step = service.KNOB_ACCEL_STEP
+        self.assertEqual(rates, [1., 1. + step, 1. + 2 * step, 1. + 3 * step])
+
+    def test_rate_is_capped(self):
+        for i in range(100):
+            rate = self.target.get_knob_rate('key_up', 10. + i * 0.01)
+        self.assertEqual(rate, service.KNOB_MAX_RATE)
+
+    def test_pause_starts_a_new_spin(self):
+        self.target.get_knob_rate('key_up', 10.)
+        self.target.get_knob_rate('key_up', 10.1)
+        self.assertEqual(self.target.get_knob_rate('key_up', 11.), 1.)
+
+    def test_directions_accelerate_separately(self):
+        self.target.get_knob_rate('key_up', 10.)
+        self.assertEqual(self.target.get_knob_rate('key_down', 10.05), 1.)
+
+
+# Key codes from linux/input-event-codes.h, evdev need not be installed
+ECODES = SimpleNamespace(EV_KEY=1, KEY_KP1=79, KEY_KPENTER=96, KEY_VOLUMEUP=115)
+
+
+class FakeDevice:
+    def __init__(self, path: str, name: str, keys, ids=(0x1234, 0x5678)):
+        self.path = path
+        self.name = name
+        self.keys = list(keys)
+        self.info = SimpleNamespace(vendor=ids[0], product=ids[1])
+
+    def capabilities(self):
+        return {ECODES.EV_KEY: self.keys}
+
+
+@mock.patch.object(service, 'ecodes', ECODES, create=True)
+class DeviceMatchTest(unittest.TestCase):
+
+    def test_pattern_matches_name_or_path(self):
+        target = service.PrinterTarget({'devices': ['*Numpad*', '/dev/input/event7']})
+        self.assertTrue(target.matches(FakeDevice('/dev/input/event3', 'USB Numpad', [])))
+        self.assertTrue(target.matches(FakeDevice('/dev/input/event7', 'Other', [])))
+        self.assertFalse(target.matches(FakeDevice('/dev/input/event4', 'Other', [])))
+
+    def test_pattern_matches_the_links_it_globs_to(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            node = os.path.join(tmp, 'event5')
+            Path(node).touch()
+            os.symlink(node, os.path.join(tmp, 'platform-usb-0:1.2:1.0-event-kbd'))
+            target = service.PrinterTarget({'devices': [os.path.join(tmp, '*usb-0:1.2*')]})
+            self.assertTrue(target.matches(FakeDevice(node, 'Keyboard', [])))
+            self.assertFalse(target.matches(FakeDevice(os.path.join(tmp, 'event6'), 'Keyboard', [])))
+
+    def test_auto_selection_skips_full_keyboards(self):
+        target = service.PrinterTarget({'devices': []})
+        keys = [30, ECODES.KEY_KP1, ECODES.KEY_KPENTER]
+        self.assertFalse(target.matches(FakeDevice('/dev/input/event1', 'USB Keyboard', keys)))
+        self.assertTrue(target.matches(FakeDevice('/dev/input/event2', '2.4G Numpad', keys)))
+        self.assertFalse(target.matches(FakeDevice('/dev/input/event3', 'Numpad Mouse', [272])))
+
+    def test_auto_selection_by_usb_ids(self):
+        target = service.PrinterTarget({'devices': []})
+        device = FakeDevice('/dev/input/event1', 'USB Keyboard', [ECODES.KEY_VOLUMEUP])
+        with mock.patch.object(service, 'AUTO_DEVICE_IDS', [(0x1234, 0x5678)]):
+            self.assertTrue(target.matches(device))
+
+
+if __name__ == '__main__':
+    unittest.main()
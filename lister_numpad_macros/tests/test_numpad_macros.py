@@ -0,0 +1,179 @@
+"""Tests for the numpad_macros component: G-code batching and knob handling.
+
+Run from the repository root:
+    python3 -m unittest discover -s lister_numpad_macros/tests
+"""
+import asyncio
+import sys
+import unittest
+from unittest import mock
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import macros_benchmark as bench  # noqa: E402
+
+MODULE = bench.load_component_module()
+
+
+class ComponentTestCase(unittest.IsolatedAsyncioTestCase):
+    """Runs a NumpadMacros instance against the benchmark's fake Moonraker and Klippy"""
+
+    async def make_component(self, mode: str = 'idle', **options: Any):
+        self.kapis = bench.FakeKlippyAPI(0., 0.)
+        self.kapis.set_mode(mode)
+        self.server = bench.FakeServer(self.kapis)
+        config = {'debug_log': 'False'}
+        config.update({name: str(value) for name, value in options.items()})
+        self.component = MODULE.NumpadMacros(bench.FakeConfig(self.server, config))
+        for callback in self.server.events.get("server:klippy_ready", []):
+            await callback()
+        self.scripts: List[str] = []
+        self.kapis.on_gcode = self.scripts.append
+        return self.component
+
+    async def asyncTearDown(self) -> None:
+        component = getattr(self, 'component', None)
+        if component is not None:
+            component._reset_state()
+            if component._z_offset_save_handle is not None:
+                component._z_offset_save_handle.cancel()
+
+    async def press(self, key: str, **fields: Any) -> Dict[str, Any]:
+        handler = self.server.endpoints["/server/numpad/event"]
+        return await handler(bench.FakeWebRequest({'key': key, 'event_type': 'down', **fields}))
+
+    async def settle(self) -> None:
+        """Wait for the knob coalescing window to be flushed"""
+        await asyncio.sleep(self.component.knob_coalesce_window + 0.05)
+
+    def lines(self) -> List[str]:
+        """G-code sent so far, without the console messages"""
+        return [line for script in self.scripts for line in script.splitlines()
+                if not line.startswith('RESPOND')]
+
+
+class GcodeBatchingTest(ComponentTestCase):
+
+    async def test_event_gcode_is_sent_as_one_script(self):
+        await self.make_component(no_confirmation_keys='key_up,key_down,key_5', key_5='G28')
+        self.assertEqual(await self.press('key_5'), {'status': 'executed'})
+        self.assertEqual(self.scripts, ['RESPOND MSG="Numpad macros: Executing G28"\nG28'])
+
+    async def test_excluded_key_sends_each_command(self):
+        await self.make_component(no_confirmation_keys='key_up,key_down,key_5', key_5='G28',
+                                  batch_exclude_keys='key_5')
+        await self.press('key_5')
+        self.assertEqual(self.scripts, ['RESPOND MSG="Numpad macros: Executing G28"', 'G28'])
+
+    async def test_event_can_opt_out_of_batching(self):
+        await self.make_component(no_confirmation_keys='key_up,key_down,key_5', key_5='G28')
+        await self.press('key_5', batch=False)
+        self.assertEqual(len(self.scripts), 2)
+
+    async def test_query_command_is_batched(self):
+        await self.make_component(key_1='_HOME_ALL')
+        self.assertEqual(await self.press('key_1'), {'status': 'queued'})
+        self.assertEqual(len(self.scripts), 1)
+        self.assertIn('_QUERY_HOME_ALL', self.scripts[0].splitlines())
+        self.assertEqual(self.component.pending_command, '_HOME_ALL')
+
+
+class KnobTest(ComponentTestCase):
+
+    async def test_ticks_in_one_window_are_coalesced(self):
+        await self.make_component('printing_high', knob_coalesce_window=0.05)
+        for _ in range(3):
+            await self.press('key_up')
+        await self.settle()
+        self.assertEqual(len(self.scripts), 1)
+        self.assertEqual(self.lines(), ['_INCREASE_KNOB_SPEED', 'M220 S130'])
+
+    async def test_rate_scales_the_steps(self):
+        await self.make_component('printing_high', knob_coalesce_window=0)
+        await self.press('key_up', rate=3)
+        self.assertEqual(self.lines(), ['_INCREASE_KNOB_SPEED', 'M220 S130'])
+
+    async def test_rate_is_capped(self):
+        await self.make_component('printing_high', knob_coalesce_window=0, knob_max_rate=2)
+        await self.press('key_up', rate=8)
+        self.assertIn('M220 S120', self.lines())
+
+    async def test_nearer_z_offset_is_never_accelerated(self):
+        await self.make_component('printing_low', knob_coalesce_window=0)
+        await self.press('key_down', rate=5)
+        self.assertIn('SET_GCODE_OFFSET Z_ADJUST=-0.01 MOVE=1', self.lines())
+
+    async def test_mixed_window_follows_the_scaled_steps(self):
+        # Two slow ticks up and one fast tick down is a net move down
+        await self.make_component('printing_high', knob_coalesce_window=0.05)
+        await self.press('key_up')
+        await self.press('key_up')
+        await self.press('key_down', rate=5)
+        await self.settle()
+        self.assertEqual(self.lines(), ['_DEACREASE_KNOB_SPEED', 'M220 S70'])
+
+    async def test_mixed_z_offset_window_moves_further(self):
+        # The fast tick down is not accelerated near the bed, leaving a net tick up
+        await self.make_component('printing_low', knob_coalesce_window=0.05)
+        await self.press('key_up')
+        await self.press('key_up')
+        await self.press('key_down', rate=5)
+        await self.settle()
+        self.assertEqual(self.lines(), ['_FURTHER_KNOB_FIRST_LAYER',
+                                        'SET_GCODE_OFFSET Z_ADJUST=0.01 MOVE=1'])
+        self.assertAlmostEqual(self.component._accumulated_z_adjust, 0.01)
+
+    async def test_next_window_adjusts_from_the_last_target(self):
+        # The snapshot has not caught up with the first M220 yet
+        await self.make_component('printing_high', knob_coalesce_window=0)
+        await self.press('key_up')
+        await self.press('key_up')
+        self.assertEqual([line for line in self.lines() if line.startswith('M220')],
+                         ['M220 S110', 'M220 S120'])
+
+    async def test_reported_value_wins_after_the_hold(self):
+        # Speed changed by something else after the knob target was sent
+        await self.make_component('printing_high', knob_coalesce_window=0)
+        await self.press('key_up')
+        self.component._handle_status_notification({'gcode_move': {'speed_factor': 1.5}}, 0.)
+        with mock.patch.object(MODULE, 'KNOB_TARGET_HOLD', 0.):
+            await self.press('key_up')
+        self.assertIn('M220 S160', self.lines())
+
+    async def test_discarded_ticks_are_not_saved(self):
+        await self.make_component('printing_low', knob_coalesce_window=0.5)
+        await self.press('key_up')
+        await self.press('key_up')
+        self.component._reset_state()
+        self.assertEqual(self.component._accumulated_z_adjust, 0.)
+        self.assertFalse(self.component._pending_z_offset_save)
+        self.assertEqual(self.scripts, [])
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_percentiles_stay_within_the_samples(self):
+        hist = MODULE.LatencyHistogram()
+        for value in (10., 10.5, 11., 11.5, 12.):
+            hist.add(value)
+        status = hist.get_status()
+        # The median falls in the 9.09-11.37 ms bucket, whose upper bound is
+        # well above the true median of 11 ms
+        self.assertAlmostEqual(status['p50'], 11., delta=0.1)
+        self.assertLessEqual(status['p99'], status['max'])
+
+
+class LatencyMetricsTest(ComponentTestCase):
+
+    async def test_unknown_keys_share_one_histogram(self):
+        await self.make_component()
+        for key in ('key_nonsense_1', 'key_nonsense_2'):
+            self.component._record_latency(key, 'query', 'handling', 1.)
+        keys = self.component.get_metrics()['keys']
+        self.assertEqual(list(keys), ['other'])
+        self.assertEqual(keys['other']['handling']['count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
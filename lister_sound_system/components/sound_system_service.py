@@ -3,6 +3,8 @@ import logging
 from pathlib import Path
 from typing import Dict, Any
 
+from .sound_manifest import DEFAULT_MANIFEST_PATH, SoundManifest
+
 
 class SoundSystemService:
     def __init__(self, config):
@@ -13,8 +15,13 @@ class SoundSystemService:
         self.sound_dir = Path(config.get('sound_directory',
                                        '/home/pi/lister_config/lister_sound_system/sounds')).expanduser().resolve()
 
-        # Initialize sound cache
+        # Initialize sound cache, shared with the Klipper extra through the manifest file
         self._sound_cache: Dict[str, str] = {}
+        self._manifest = SoundManifest(
+            self.sound_dir,
+            Path(config.get('manifest_path', DEFAULT_MANIFEST_PATH)).expanduser(),
+            logging.getLogger(__name__)
+        )
 
         # Register API endpoints
         self.server.register_endpoint(
@@ -36,19 +43,6 @@ class SoundSystemService:
 
         logging.info(f"Sound System Service initialized with dir: {self.sound_dir}")
 
-    def _verify_sound_file(self, path: Path) -> bool:
-        """Verify if file exists and is an MP3 file"""
-        try:
-            if not path.is_file():
-                return False
-            
-            # Check file extension
-            return path.suffix.lower() == '.mp3'
-            
-        except Exception as e:
-            logging.error(f"Error verifying sound file {path}: {e}")
-            return False
-
     async def _scan_sounds(self) -> Dict[str, str]:
         """Scan sound directory and update cache"""
         sounds: Dict[str, str] = {}
@@ -60,10 +54,10 @@ class SoundSystemService:
 
             # Only scan if cache is empty or force scan requested
             if not self._sound_cache:
-                # Scan for MP3 files
-                for file_path in self.sound_dir.glob("*.mp3"):
-                    if self._verify_sound_file(file_path):
-                        sounds[file_path.stem] = str(file_path)
+                # Files are only read when they changed since the manifest was saved
+                await self.server.get_event_loop().run_in_thread(self._manifest.refresh)
+                for entry in self._manifest.entries():
+                    sounds[entry.name] = str(entry.path)
 
                 self._sound_cache = sounds
 
@@ -91,6 +85,7 @@ class SoundSystemService:
         if self._sound_cache:
             return {
                 'sounds': self._sound_cache,
+                'details': self._get_details(),
                 'sound_dir': str(self.sound_dir)
             }
         
@@ -98,9 +93,14 @@ class SoundSystemService:
         sounds = await self._scan_sounds()
         return {
             'sounds': sounds,
+            'details': self._get_details(),
             'sound_dir': str(self.sound_dir)
         }
 
+    def _get_details(self) -> Dict[str, Dict[str, Any]]:
+        """Manifest entries (size, duration, sample rate, checksum) by sound name"""
+        return {entry.name: entry.to_dict() for entry in self._manifest.entries()}
+
     async def _handle_play_request(self, web_request) -> Dict[str, Any]:
         """Handle request to play a sound"""
         sound = web_request.get_str('sound')
@@ -140,6 +140,7 @@ class SoundSystemService:
         return {
             'status': 'success',
             'sounds': sounds,
+            'details': self._get_details(),
             'sound_dir': str(self.sound_dir)
         }
 
@@ -177,12 +178,20 @@ class SoundSystemService:
         except Exception as e:
             logging.error(f"Error getting audio info: {e}")
 
+        # The Klipper extra picks the backend, pcm with pyalsaaudio or mpg123
+        player = 'unknown'
+        try:
+            result = await self.klippy.query_objects({'sound_system': ['player']})
+            player = result.get('sound_system', {}).get('player', {}).get('backend', player)
+        except Exception as e:
+            logging.error(f"Error querying sound system player: {e}")
+
         return {
             'status': 'online',
             'sound_dir': str(self.sound_dir),
             'sound_count': len(self._sound_cache),
             'audio_system': audio_info,
-            'player': 'mpg123'
+            'player': player
         }
 
     async def close(self) -> None:
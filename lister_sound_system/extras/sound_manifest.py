@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+# Shared by the Klipper extra and the Moonraker component, both link this file next to themselves
+DEFAULT_MANIFEST_PATH = '/home/pi/printer_data/cache/sound_system/manifest.json'
+MANIFEST_VERSION = 1
+
+# MPEG audio header tables, indexed by version (1, 2, 2.5) and layer (1, 2, 3)
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+_VERSIONS = {3: 1, 2: 2, 0: 2.5}
+_LAYERS = {3: 1, 2: 2, 1: 3}
+
+
+def read_mp3_info(path: Path, size: int) -> Tuple[float, int]:
+    """Duration in seconds and sample rate of an MP3 file, read from its first frame header"""
+    with open(path, 'rb') as f:
+        data = f.read(64 * 1024)
+
+    start = 0
+    if data[:3] == b'ID3' and len(data) >= 10:
+        # ID3v2 tag, size is a 28-bit syncsafe integer
+        tag_size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        start = 10 + tag_size + (10 if data[5] & 0x10 else 0)
+        if start + 4 > len(data):
+            with open(path, 'rb') as f:
+                f.seek(start)
+                data = data[:start] + f.read(64 * 1024)
+
+    for pos in range(start, len(data) - 4):
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        if data[pos] != 0xFF or b1 & 0xE0 != 0xE0:
+            continue
+        version = _VERSIONS.get((b1 >> 3) & 3)
+        layer = _LAYERS.get((b1 >> 1) & 3)
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+        if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+            continue  # Not a valid frame header, keep looking
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        bitrate = _BITRATES[(min(version, 2), layer)][bitrate_index] * 1000
+        if layer == 1:
+            samples_per_frame = 384
+        elif layer == 3 and version != 1:
+            samples_per_frame = 576
+        else:
+            samples_per_frame = 1152
+
+        # A Xing/Info or VBRI header in the first frame holds the frame count
+        mono = (b3 >> 6) == 3
+        if version == 1:
+            xing = pos + 4 + (17 if mono else 32)
+        else:
+            xing = pos + 4 + (9 if mono else 17)
+        if data[xing:xing + 4] in (b'Xing', b'Info') and data[xing + 7] & 1:
+            frames = int.from_bytes(data[xing + 8:xing + 12], 'big')
+            return frames * samples_per_frame / float(sample_rate), sample_rate
+        if data[pos + 36:pos + 40] == b'VBRI':
+            frames = int.from_bytes(data[pos + 50:pos + 54], 'big')
+            return frames * samples_per_frame / float(sample_rate), sample_rate
+
+        # Constant bitrate
+        return (size - pos) * 8 / float(bitrate), sample_rate
+    raise ValueError("no MPEG audio frame found")
+
+
+class SoundEntry:
+    """One sound file in the manifest"""
+
+    FIELDS = ('name', 'path', 'size', 'mtime', 'duration', 'sample_rate', 'checksum')
+
+    def __init__(self, name: str, path: Path, size: int, mtime: float,
+                 duration: Optional[float], sample_rate: Optional[int], checksum: str):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.checksum = checksum
+
+    def to_dict(self) -> Dict[str, Any]:
+        entry = {field: getattr(self, field) for field in self.FIELDS}
+        entry['path'] = str(self.path)
+        return entry
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> 'SoundEntry':
+        return cls(entry['name'], Path(entry['path']), entry['size'], entry['mtime'],
+                   entry.get('duration'), entry.get('sample_rate'), entry['checksum'])
+
+
+class SoundManifest:
+    """Index of the sound directory keyed by sound name, saved to a cache file.
+
+    Cached entries are reused while a file's size and mtime are unchanged, so
+    only new or edited sounds are read, hashed and probed on refresh."""
+
+    def __init__(self, sound_dir: Path, cache_path: Path, logger: logging.Logger):
+        self.sound_dir = sound_dir
+        self.cache_path = cache_path
+        self.logger = logger
+        self._entries: Dict[str, SoundEntry] = {}
+        self._refresh_lock = Lock()
+        # Guards starting the background refresh, never held while scanning
+        self._thread_lock = Lock()
+        self._refresh_thread: Optional[Thread] = None
+
+    def _load_cache(self) -> Dict[str, SoundEntry]:
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            if data.get('version') != MANIFEST_VERSION or data.get('sound_dir') != str(self.sound_dir):
+                return {}
+            return {entry['name']: SoundEntry.from_dict(entry) for entry in data['sounds']}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Ignoring sound manifest {self.cache_path}: {e}")
+            return {}
+
+    def _save_cache(self, entries: Dict[str, SoundEntry]):
+        data = {
+            'version': MANIFEST_VERSION,
+            'sound_dir': str(self.sound_dir),
+            'sounds': [entry.to_dict() for entry in entries.values()]
+        }
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self.logger.warning(f"Could not save sound manifest {self.cache_path}: {e}")
+
+    def _probe(self, name: str, path: Path, size: int, mtime: float) -> SoundEntry:
+        with open(path, 'rb') as f:
+            checksum = hashlib.sha1(f.read()).hexdigest()
+        try:
+            duration, sample_rate = read_mp3_info(path, size)
+            duration = round(duration, 3)
+        except (OSError, ValueError, IndexError) as e:
+            self.logger.warning(f"Could not read MP3 header of {path.name}: {e}")
+            duration = sample_rate = None
+        return SoundEntry(name, path, size, mtime, duration, sample_rate, checksum)
+
+    def refresh(self) -> bool:
+        """Bring the manifest up to date with the sound directory, True if anything changed"""
+        with self._refresh_lock:
+            known = self._entries or self._load_cache()
+            entries: Dict[str, SoundEntry] = {}
+            probed = 0
+            try:
+                with os.scandir(self.sound_dir) as it:
+                    dir_entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                self.logger.error(f"Error scanning sound directory {self.sound_dir}: {e}")
+                dir_entries = []
+            for dir_entry in dir_entries:
+                path = Path(dir_entry.path)
+                if path.suffix.lower() != '.mp3':
+                    continue
+                try:
+                    if not dir_entry.is_file():
+                        continue
+                    stat = dir_entry.stat()
+                    entry = known.get(path.stem)
+                    if (entry is None or entry.path != path or entry.size != stat.st_size
+                            or entry.mtime != stat.st_mtime):
+                        entry = self._probe(path.stem, path, stat.st_size, stat.st_mtime)
+                        probed += 1
+                    entries[path.stem] = entry
+                except OSError as e:
+                    self.logger.error(f"Error reading sound file {path}: {e}")
+
+            changed = probed > 0 or entries.keys() != known.keys()
+            if changed or not self.cache_path.exists():
+                self._save_cache(entries)
+            if changed:
+                self.logger.info(f"Sound manifest: {len(entries)} sounds, {probed} probed")
+            self._entries = entries
+            return changed
+
+    def load(self) -> None:
+        """Take the entries from the cache file as they are, without reading the sound directory"""
+        if not self._entries:
+            self._entries = self._load_cache()
+
+    def refresh_in_background(self) -> None:
+        """Refresh on a daemon thread, lookups use the current entries until it is swapped in"""
+        with self._thread_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = Thread(target=self.refresh, daemon=True)
+            self._refresh_thread.start()
+
+    def find(self, name: str) -> Optional[SoundEntry]:
+        """Look up a sound by name, with or without the .mp3 extension"""
+        entry = self._entries.get(name)
+        if entry is None and name.lower().endswith('.mp3'):
+            entry = self._entries.get(name[:-4])
+        return entry
+
+    def entries(self) -> List[SoundEntry]:
+        return list(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,12 +1,659 @@
+import hashlib
 import logging
 import subprocess
+import tempfile
+import time
+import wave
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from threading import Thread
-from typing import Optional
-import psutil
-import signal
+from threading import Condition, Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import os
 
+try:
+    import alsaaudio
+except ImportError:
+    alsaaudio = None
+
+from .sound_manifest import DEFAULT_MANIFEST_PATH, SoundManifest
+
+
+class SampleWindow:
+    """Most recent timing samples in seconds, summarized as percentiles for get_status"""
+
+    def __init__(self, size: int = 200):
+        self._samples: "deque[float]" = deque(maxlen=size)
+        self._lock = Lock()
+        self.count = 0
+
+    def add(self, value: float):
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+
+    def get_status(self) -> Dict[str, float]:
+        with self._lock:
+            ordered = sorted(self._samples)
+        status: Dict[str, float] = {'count': self.count}
+        if ordered:
+            for name, q in (('p50', .5), ('p90', .9), ('p99', .99)):
+                status[name] = round(ordered[int(round(q * (len(ordered) - 1)))], 4)
+            status['max'] = round(ordered[-1], 4)
+        return status
+
+
+class Mpg123Player:
+    """Long-lived mpg123 in remote control mode (-R), files are played with LOAD over stdin"""
+
+    def __init__(self, mpg123_path: str, logger: logging.Logger):
+        self.mpg123_path = mpg123_path
+        self.logger = logger
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = Lock()
+        # Set when the current play finishes, fails or is replaced by another
+        self._playback: Optional[Event] = None
+        self._state = 'idle'  # idle, loading or playing
+        self._error: Optional[str] = None
+        self._closing = False
+        self.restarts = 0
+        self.timeouts = 0
+        # When the current or last file started playing
+        self.started_at: Optional[float] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._state != 'idle'
+
+    def get_status(self) -> Dict[str, Any]:
+        process = self._process
+        running = process is not None and process.poll() is None
+        return {'state': self._state, 'running': running,
+                'pid': process.pid if running else None, 'restarts': self.restarts}
+
+    def _start(self):
+        self._process = subprocess.Popen(
+            [self.mpg123_path, '-R'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+        # No frame progress messages, only state changes
+        self._send('SILENCE')
+        Thread(target=self._read_output, args=(self._process,), daemon=True).start()
+        self.logger.info(f"Started mpg123 player (pid {self._process.pid})")
+
+    def _ensure_running(self):
+        if self._process is not None and self._process.poll() is None:
+            return
+        if self._process is not None:
+            self.restarts += 1
+            self.logger.warning(
+                f"mpg123 player exited (code {self._process.returncode}), restarting")
+        self._start()
+
+    def _send(self, command: str):
+        self._process.stdin.write(command + '\n')
+        self._process.stdin.flush()
+
+    def _finish(self, error: Optional[str] = None):
+        """Mark the current play as done, called with the lock held"""
+        self._state = 'idle'
+        self._error = error
+        if self._playback is not None:
+            self._playback.set()
+
+    def _read_output(self, process: subprocess.Popen):
+        for line in process.stdout:
+            line = line.strip()
+            with self._lock:
+                if process is not self._process:
+                    break
+                if line.startswith('@P 2') or line.startswith('@S '):
+                    if self._state == 'loading':
+                        self._state = 'playing'
+                        self.started_at = time.monotonic()
+                elif line.startswith('@P 0'):
+                    # A stop left over from a replaced play arrives while loading
+                    if self._state == 'playing':
+                        self._finish()
+                elif line.startswith('@E'):
+                    self.logger.error(f"mpg123: {line[3:]}")
+                    if self._state != 'idle':
+                        self._finish(line[3:])
+
+        try:
+            code = process.wait(timeout=1.)
+        except subprocess.TimeoutExpired:
+            code = None
+        with self._lock:
+            if process is not self._process:
+                return
+            self._finish(f"player exited (code {code})")
+            if self._closing:
+                return
+        # Restart right away so the next sound doesn't pay the startup cost
+        time.sleep(1.)
+        with self._lock:
+            if not self._closing and process is self._process:
+                try:
+                    self._ensure_running()
+                except OSError as e:
+                    self.logger.error(f"Could not restart mpg123 player: {e}")
+
+    def start(self):
+        with self._lock:
+            self._closing = False
+            self._ensure_running()
+
+    def play(self, sound_path: Path, timeout: float,
+             cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """Play a file and wait until it ends, False if it failed or timed out.
+
+        Nothing is played if cancelled() is true when the player is ready to start"""
+        with self._lock:
+            if cancelled is not None and cancelled():
+                return True
+            self._ensure_running()
+            if self._playback is not None:
+                self._playback.set()  # Replaced by this play
+            playback = self._playback = Event()
+            self._state = 'loading'
+            self._error = None
+            self.started_at = None
+            self._send(f'LOAD {sound_path}')
+
+        finished = playback.wait(timeout)
+        with self._lock:
+            if self._playback is not playback:
+                return True  # Replaced by a newer play
+            self._playback = None
+            if not finished:
+                self.logger.error("Play timeout - stopping player")
+                self.timeouts += 1
+                self._state = 'idle'
+                try:
+                    self._send('STOP')
+                except OSError:
+                    pass
+                return False
+            if self._error:
+                self.logger.error(f"Play failed: {self._error}")
+                return False
+        return True
+
+    def stop(self):
+        """Stop the current sound, the player keeps running"""
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                return
+            if self._state != 'idle':
+                self._send('STOP')
+                self._finish()
+
+    def close(self):
+        with self._lock:
+            self._closing = True
+            process = self._process
+            self._finish()
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.write('QUIT\n')
+            process.stdin.flush()
+            process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+
+
+class PcmClip:
+    """A decoded sound, 16-bit PCM frames with their format"""
+
+    def __init__(self, path: Path, mtime: float, channels: int, rate: int,
+                 sampwidth: int, frames: bytes):
+        self.path = path
+        self.mtime = mtime
+        self.channels = channels
+        self.rate = rate
+        self.sampwidth = sampwidth
+        self.frames = frames
+
+    @property
+    def duration(self) -> float:
+        return len(self.frames) / float(self.rate * self.channels * self.sampwidth)
+
+
+class PcmCache:
+    """Sounds decoded once to WAV files on disk, and kept in memory up to max_bytes (LRU)"""
+
+    def __init__(self, mpg123_path: str, cache_dir: Path, max_bytes: int,
+                 logger: logging.Logger):
+        self.mpg123_path = mpg123_path
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._clips: "OrderedDict[Path, PcmClip]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.decode_times = SampleWindow()
+
+    def _wav_path(self, sound_path: Path) -> Path:
+        # Sounds with the same name in different directories get their own file
+        digest = hashlib.sha1(str(sound_path).encode()).hexdigest()[:12]
+        return self.cache_dir / f"{sound_path.stem}-{digest}.wav"
+
+    def _decode(self, sound_path: Path, wav_path: Path):
+        # A temporary file per decode, a concurrent decode of the same sound
+        # (a preload racing a play) must not write into it
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{wav_path.stem}.",
+                                        suffix='.tmp')
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            result = subprocess.run(
+                [self.mpg123_path, '-q', '-w', str(tmp_path), str(sound_path)],
+                capture_output=True, text=True, timeout=30
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"decode failed (code {result.returncode}): {result.stderr}")
+            os.replace(tmp_path, wav_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _load(self, sound_path: Path, mtime: float) -> PcmClip:
+        wav_path = self._wav_path(sound_path)
+        try:
+            fresh = wav_path.stat().st_mtime >= mtime
+        except OSError:
+            fresh = False
+        if not fresh:
+            start = time.monotonic()
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._decode(sound_path, wav_path)
+            elapsed = time.monotonic() - start
+            self.decode_times.add(elapsed)
+            self.logger.info(f"Decoded {sound_path.name} in {elapsed:.3f}s")
+        with wave.open(str(wav_path), 'rb') as wav:
+            return PcmClip(sound_path, mtime, wav.getnchannels(), wav.getframerate(),
+                           wav.getsampwidth(), wav.readframes(wav.getnframes()))
+
+    def get(self, sound_path: Path) -> Optional[PcmClip]:
+        """Decoded clip for a sound file, None if it could not be decoded"""
+        try:
+            mtime = sound_path.stat().st_mtime
+        except OSError as e:
+            self.logger.error(f"Error reading {sound_path}: {e}")
+            return None
+        with self._lock:
+            clip = self._clips.get(sound_path)
+            if clip is not None and clip.mtime == mtime:
+                self._clips.move_to_end(sound_path)
+                self.hits += 1
+                return clip
+            self.misses += 1
+
+        try:
+            clip = self._load(sound_path, mtime)
+        except (OSError, RuntimeError, EOFError, wave.Error, subprocess.TimeoutExpired) as e:
+            self.logger.error(f"Error decoding {sound_path.name}: {e}")
+            return None
+
+        with self._lock:
+            old = self._clips.pop(sound_path, None)
+            if old is not None:
+                self._bytes -= len(old.frames)
+            if len(clip.frames) <= self.max_bytes:
+                self._clips[sound_path] = clip
+                self._bytes += len(clip.frames)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._clips.popitem(last=False)
+                    self._bytes -= len(evicted.frames)
+        return clip
+
+    def preload(self, sound_paths: List[Path]):
+        for sound_path in sound_paths:
+            self.get(sound_path)
+
+    def get_status(self) -> Dict[str, int]:
+        return {'clips': len(self._clips), 'bytes': self._bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+
+class AlsaPcmPlayer:
+    """Plays decoded clips straight to an ALSA device from this process"""
+
+    # Frames written per chunk, a newer play takes over within one chunk
+    PERIOD_SIZE = 1024
+
+    def __init__(self, device: str, logger: logging.Logger):
+        self.device = device
+        self.logger = logger
+        self._lock = Lock()
+        self._write_lock = Lock()
+        self._generation = 0
+        self._busy = False
+        self.timeouts = 0
+        # Plays ALSA refused, these are retried through mpg123
+        self.errors = 0
+        # When the current or last clip started playing
+        self.started_at: Optional[float] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    def play(self, clip: PcmClip, timeout: float,
+             cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """Play a clip and wait until it ends, False if it failed or timed out.
+
+        Nothing is played if cancelled() is true when the player is ready to start"""
+        with self._lock:
+            if cancelled is not None and cancelled():
+                return True
+            self._generation += 1
+            generation = self._generation
+        with self._write_lock:
+            if generation != self._generation:
+                return True  # Replaced before it started
+            self._busy = True
+            self.started_at = None
+            pcm = None
+            try:
+                pcm = alsaaudio.PCM(
+                    alsaaudio.PCM_PLAYBACK, device=self.device,
+                    channels=clip.channels, rate=clip.rate,
+                    format=alsaaudio.PCM_FORMAT_S16_LE, periodsize=self.PERIOD_SIZE
+                )
+                chunk = self.PERIOD_SIZE * clip.channels * clip.sampwidth
+                deadline = time.monotonic() + timeout
+                for offset in range(0, len(clip.frames), chunk):
+                    if generation != self._generation:
+                        pcm.drop()
+                        return True
+                    if time.monotonic() > deadline:
+                        self.logger.error("Play timeout - stopping playback")
+                        self.timeouts += 1
+                        pcm.drop()
+                        return False
+                    pcm.write(clip.frames[offset:offset + chunk])
+                    if self.started_at is None:
+                        self.started_at = time.monotonic()
+                pcm.drain()
+                return True
+            except alsaaudio.ALSAAudioError as e:
+                self.logger.error(f"ALSA playback failed: {e}")
+                self.errors += 1
+                return False
+            finally:
+                if pcm is not None:
+                    pcm.close()
+                self._busy = False
+
+    def stop(self):
+        """Stop the current clip"""
+        with self._lock:
+            self._generation += 1
+
+
+class QueuedSound:
+    """A sound, or a sequence of sounds played as one, waiting in the scheduler queue"""
+
+    def __init__(self, sound_paths: Tuple[Path, ...], priority: int, seq: int, urgent: bool):
+        self.sound_paths = sound_paths
+        self.priority = priority
+        self.seq = seq
+        self.urgent = urgent
+        self.queued_at = time.monotonic()
+        # SoundScheduler.stop_generation when the sound was taken from the queue
+        self.generation = 0
+
+    def sort_key(self):
+        return (not self.urgent, -self.priority, self.seq)
+
+    @property
+    def name(self) -> str:
+        return ', '.join(path.name for path in self.sound_paths)
+
+
+class SoundScheduler:
+    """Plays sounds one at a time from a bounded priority queue on a worker thread.
+
+    Identical sounds already queued or playing are merged, a higher priority or
+    urgent (NOW=1) sound stops the current one, and low priority feedback that
+    waited too long is skipped."""
+
+    PRIORITIES = {'low': 0, 'normal': 1, 'high': 2}
+
+    def __init__(self, play: Callable[[QueuedSound], bool], stop: Callable[[], None],
+                 max_queue: int, feedback_max_delay: float, logger: logging.Logger):
+        self._play = play
+        self._stop = stop
+        self.max_queue = max_queue
+        self.feedback_max_delay = feedback_max_delay
+        self.logger = logger
+        self._cond = Condition()
+        self._queue: List[QueuedSound] = []
+        self._current: Optional[QueuedSound] = None
+        self._seq = 0
+        self._closing = False
+        # Bumped by every preemption, a sound taken from the queue before it
+        # is not started, or stopped between the parts of a sequence
+        self.stop_generation = 0
+        self.plays = 0
+        self.merged = 0
+        self.drops = 0
+        self.preemptions = 0
+        self.failures = 0
+        Thread(target=self._run, daemon=True).start()
+
+    def submit(self, sound_paths: Tuple[Path, ...], priority: int, urgent: bool = False) -> str:
+        """Queue a sound or sequence, returns 'queued', 'merged' or 'dropped'"""
+        with self._cond:
+            current = self._current
+            if not urgent and current is not None and current.sound_paths == sound_paths:
+                self.merged += 1
+                return 'merged'
+
+            queued = next((q for q in self._queue if q.sound_paths == sound_paths), None)
+            if queued is not None:
+                if not urgent:
+                    if priority > queued.priority:
+                        queued.priority = priority
+                        self._queue.sort(key=QueuedSound.sort_key)
+                        self._preempt(current, queued)
+                    self.merged += 1
+                    return 'merged'
+                self._queue.remove(queued)
+
+            if len(self._queue) >= self.max_queue:
+                # Make room by dropping the least important, oldest sound
+                victim = min(self._queue, key=lambda q: (q.urgent, q.priority, q.seq))
+                if not urgent and (victim.urgent or victim.priority > priority):
+                    self.drops += 1
+                    self.logger.info(f"Sound queue full, dropped {sound_paths[0].name}")
+                    return 'dropped'
+                self._queue.remove(victim)
+                self.drops += 1
+                self.logger.info(f"Sound queue full, dropped {victim.name}")
+
+            self._seq += 1
+            item = QueuedSound(sound_paths, priority, self._seq, urgent)
+            self._queue.append(item)
+            self._queue.sort(key=QueuedSound.sort_key)
+            self._preempt(current, item)
+            self._cond.notify()
+            return 'queued'
+
+    def _preempt(self, current: Optional[QueuedSound], item: QueuedSound):
+        """Stop the current sound if item outranks it, called with the lock held"""
+        if current is not None and (item.urgent or item.priority > current.priority):
+            self.preemptions += 1
+            self.stop_generation += 1
+            self.logger.info(f"Stopping {current.name} for {item.name}")
+            self._stop()
+
+    def is_stopped(self, item: QueuedSound) -> bool:
+        """Whether the sound was preempted since it was taken from the queue"""
+        return item.generation != self.stop_generation
+
+    def _next(self) -> Optional[QueuedSound]:
+        with self._cond:
+            while not self._queue and not self._closing:
+                self._cond.wait()
+            if self._closing:
+                return None
+            item = self._queue.pop(0)
+            item.generation = self.stop_generation
+            self._current = item
+            return item
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            try:
+                waited = time.monotonic() - item.queued_at
+                if item.priority == self.PRIORITIES['low'] and waited > self.feedback_max_delay:
+                    self.drops += 1
+                    self.logger.info(f"Skipped stale {item.name} ({waited:.1f}s late)")
+                    continue
+                self.plays += 1
+                if not self._play(item):
+                    self.failures += 1
+            except Exception as e:
+                self.failures += 1
+                self.logger.error(f"Play thread error: {e}")
+            finally:
+                with self._cond:
+                    self._current = None
+
+    def clear(self):
+        with self._cond:
+            self._queue.clear()
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._queue.clear()
+            self._cond.notify()
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._cond:
+            current = self._current
+            return {
+                'current': current.name if current is not None else None,
+                'queue_depth': len(self._queue),
+                'queued': [item.name for item in self._queue],
+            }
+
+
+class MixerWorker:
+    """Runs amixer on a worker thread so volume changes never block the reactor.
+
+    Steps only move the target volume, the worker then sets the latest target
+    once, so a burst of knob ticks costs a single amixer call."""
+
+    def __init__(self, amixer_path: str, min_volume: int, max_volume: int,
+                 logger: logging.Logger, control: str = 'PCM'):
+        self.amixer_path = amixer_path
+        self.min_volume = min_volume
+        self.max_volume = max_volume
+        self.control = control
+        self.logger = logger
+        self._cond = Condition()
+        self.volume: Optional[int] = None  # Last volume read from or set on the mixer
+        self._target: Optional[int] = None
+        self._applied: Optional[int] = None
+        self._pending_delta = 0  # Steps taken before the first read finished
+        self._closing = False
+        self.sets = 0
+        self.folded = 0
+        Thread(target=self._run, daemon=True).start()
+
+    @property
+    def target(self) -> Optional[int]:
+        """Volume the mixer is set to, or being set to"""
+        return self._target if self._target is not None else self.volume
+
+    def _clamp(self, volume: int) -> int:
+        return max(self.min_volume, min(self.max_volume, volume))
+
+    def step(self, delta: int) -> Optional[int]:
+        """Move the target volume by delta, returns the new target or None while it is still unknown"""
+        with self._cond:
+            if self._target is None:
+                self._pending_delta += delta
+                self._cond.notify()
+                return None
+            if self._target != self._applied:
+                self.folded += 1
+            self._target = self._clamp(self._target + delta)
+            self._cond.notify()
+            return self._target
+
+    def _read_volume(self) -> int:
+        try:
+            result = subprocess.run([self.amixer_path, '-M', 'sget', self.control],
+                                    capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                # Playback level is reported as e.g. "Mono: Playback 200 [80%] [...]"
+                for line in result.stdout.splitlines():
+                    if 'Mono:' in line and '%]' in line:
+                        volume = int(line.split('[')[1].split('%]')[0])
+                        self.logger.info(f"Initial volume state: {volume}%")
+                        return volume
+            self.logger.error(f"Error reading volume: {result.stderr.strip()}")
+        except (IndexError, ValueError) as e:
+            self.logger.error(f"Error parsing volume output: {e}")
+        except Exception as e:
+            self.logger.error(f"Error getting initial volume state: {e}")
+        return 50  # Default to 50% if the mixer could not be read
+
+    def _set_volume(self, volume: int) -> bool:
+        try:
+            result = subprocess.run([self.amixer_path, '-M', 'sset', self.control, f'{volume}%'],
+                                    capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                return True
+            self.logger.error(f"Volume set failed: {result.stderr.strip()}")
+        except subprocess.TimeoutExpired:
+            self.logger.error("Volume set timeout")
+        except Exception as e:
+            self.logger.error(f"Volume set error: {e}")
+        return False
+
+    def _run(self):
+        volume = self._read_volume()
+        with self._cond:
+            self.volume = self._applied = volume
+            self._target = self._clamp(volume + self._pending_delta)
+            self._pending_delta = 0
+        while True:
+            with self._cond:
+                while self._target == self._applied and not self._closing:
+                    self._cond.wait()
+                if self._closing:
+                    return
+                target = self._applied = self._target
+            self.sets += 1
+            if self._set_volume(target):
+                self.volume = target
+            else:
+                with self._cond:
+                    # Only fall back if no newer step arrived meanwhile
+                    if self._target == target:
+                        self._target = self._applied = self.volume
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+
 
 class SoundSystem:
     def __init__(self, config):
@@ -22,11 +669,17 @@ class SoundSystem:
                                        '/home/pi/lister_config/lister_sound_system/sounds')).resolve()
         self.logger.info(f"Sound directory: {self.sound_dir}")
 
+        # Sounds are looked up by name in the manifest instead of on disk, it
+        # starts from the cache file and is brought up to date off the reactor
+        self._manifest = SoundManifest(
+            self.sound_dir, Path(config.get('manifest_path', DEFAULT_MANIFEST_PATH)), self.logger)
+        self._manifest.load()
+        self._manifest.refresh_in_background()
+
         # Volume control configuration
         self.volume_step = config.getint('volume_step', 5)  # Default 5% steps
         self.max_volume = config.getint('max_volume', 100)
         self.min_volume = config.getint('min_volume', 0)
-        self._current_volume = None  # Will be initialized when first needed
 
         # Find mpg123 and amixer
         self.mpg123_path = self._get_mpg123_path()
@@ -38,12 +691,56 @@ class SoundSystem:
             self.logger.error("'amixer' not found in system path")
             return
 
-        # Initialize volume state
-        self._init_volume_state()
+        # One mpg123 process plays every sound
+        self._player = Mpg123Player(self.mpg123_path, self.logger)
+
+        # Decoded sounds played straight to ALSA, mpg123 is used without pyalsaaudio
+        self._pcm_cache = PcmCache(
+            self.mpg123_path,
+            Path(config.get('pcm_cache_dir', '/home/pi/printer_data/cache/sound_system')),
+            int(config.getfloat('pcm_cache_size', 16., minval=0.) * 1024 * 1024),
+            self.logger
+        )
+        self._pcm_player: Optional[AlsaPcmPlayer] = None
+        if alsaaudio is not None:
+            self._pcm_player = AlsaPcmPlayer(config.get('alsa_device', 'default'), self.logger)
+        else:
+            self.logger.info("pyalsaaudio not installed, playing sounds with mpg123")
+        preload = config.get('preload_sounds', 'up, down, chime, received')
+        self.preload_sounds = [name.strip() for name in preload.split(',') if name.strip()]
+
+        # Priority of sounds played without PRIORITY, others are 'normal'
+        self.sound_priorities: Dict[str, int] = {}
+        for level, default in (
+                ('low', 'up, down, chime, received, increase, decrease, faster, slower, '
+                        'further, nearer, higher, lower, touching_knob'),
+                ('high', 'emergency_stop, error, printer_error, printer_in_error, '
+                         'filament_ran_out, no_filament_detected, probe_calibration_timeout')):
+            names = config.get(f'{level}_priority_sounds', default)
+            for name in names.split(','):
+                if name.strip():
+                    self.sound_priorities[name.strip()] = SoundScheduler.PRIORITIES[level]
+        self._scheduler = SoundScheduler(
+            self._play_item,
+            self._stop_playback,
+            config.getint('sound_queue_size', 8, minval=1),
+            config.getfloat('feedback_max_delay', 2., above=0.),
+            self.logger
+        )
+        # Time from PLAY_SOUND to the first audio, reported by get_status
+        self.start_latency = SampleWindow()
+        self._started_at: Optional[float] = None
+        self.printer.register_event_handler("klippy:ready", self._handle_ready)
+        self.printer.register_event_handler("klippy:disconnect", self._handle_disconnect)
+
+        # Volume is read and set on the mixer worker thread
+        self._mixer = MixerWorker(self.amixer_path, self.min_volume, self.max_volume, self.logger)
 
-        # Stream handling
+        # Stream handling, mpv is started and stopped in order on one thread
         self.mpv_path = self._get_mpv_path()
         self._stream_process = None
+        self._stream_active = False
+        self._stream_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sound-stream')
         
         # Get streams from config
         default_streams = "\n".join([
@@ -63,7 +760,11 @@ class SoundSystem:
 
         # Register commands
         self.gcode.register_command('PLAY_SOUND', self.cmd_PLAY_SOUND,
-                                  desc="Play a sound file (PLAY_SOUND SOUND=filename)")
+                                  desc="Play a sound file (PLAY_SOUND SOUND=filename "
+                                       "[PRIORITY=low|normal|high] [NOW=1])")
+        self.gcode.register_command('PLAY_SEQUENCE', self.cmd_PLAY_SEQUENCE,
+                                  desc="Play sounds back to back (PLAY_SEQUENCE SOUNDS=a,b,c "
+                                       "[PRIORITY=low|normal|high] [NOW=1])")
         self.gcode.register_command('SOUND_LIST', self.cmd_SOUND_LIST,
                                   desc="List available sound files")
         self.gcode.register_command('VOLUME_UP', self.cmd_VOLUME_UP,
@@ -73,53 +774,147 @@ class SoundSystem:
         self.gcode.register_command('STREAM_RADIO', self.cmd_STREAM_RADIO,
                                   desc="Toggle radio stream playback")
 
-        # Add sound playback state tracking
-        self._sound_playing = False
-
-    def _init_volume_state(self):
-        """Initialize volume state by getting current system volume"""
+    def _handle_ready(self):
+        """Start the player and decode the frequent sounds up front so they play without delay"""
         try:
-            cmd = [self.amixer_path, '-M', 'sget', 'PCM']
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                # Parse the output to get current volume percentage
-                output = result.stdout
-                if 'Mono:' in output:
-                    try:
-                        # Find the line with 'Mono: Playback'
-                        mono_line = [line for line in output.split('\n') if 'Mono:' in line][0]
-                        # Extract the percentage value
-                        percentage = int(mono_line.split('[')[1].split('%]')[0])
-                        self._current_volume = percentage
-                        self.logger.info(f"Initial volume state: {self._current_volume}%")
-                    except (IndexError, ValueError) as e:
-                        self.logger.error(f"Error parsing volume output: {e}")
-                        self._current_volume = 50  # Default to 50% if parsing fails
-        except Exception as e:
-            self.logger.error(f"Error getting initial volume state: {e}")
-            self._current_volume = 50  # Default to 50% if command fails
+            self._player.start()
+        except OSError as e:
+            self.logger.error(f"Could not start mpg123 player: {e}")
+        if self._pcm_player is not None:
+            Thread(target=self._preload, daemon=True).start()
 
-    def _set_volume(self, volume: int) -> bool:
-        """Set absolute volume level"""
-        volume = max(self.min_volume, min(self.max_volume, volume))  # Clamp value
-        try:
-            cmd = [self.amixer_path, '-M', 'sset', 'PCM', f'{volume}%']
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-            # subprocess.run('play -n synth 0.2 sine 600', capture_output=True, text=True, timeout=0.22)
+    def _preload(self):
+        """Decode the preloaded sounds once the manifest is up to date, runs on its own thread"""
+        self._manifest.refresh()
+        paths = [entry.path for entry in map(self._manifest.find, self.preload_sounds) if entry]
+        self._pcm_cache.preload(paths)
 
-            if result.returncode == 0:
-                self._current_volume = volume
-                return True
-            else:
-                self.logger.error(f"Volume set failed: {result.stderr}")
+    def _play_item(self, item: QueuedSound) -> bool:
+        """Play a scheduled sound or sequence, recording how long it took to start"""
+        self._started_at = None
+        result = self._play(item.sound_paths, self._play_timeout(item.sound_paths),
+                            lambda: self._scheduler.is_stopped(item))
+        if self._started_at is not None:
+            self.start_latency.add(self._started_at - item.queued_at)
+        return result
+
+    def _play_on(self, player, source, timeout: float, cancelled: Callable[[], bool]) -> bool:
+        called = time.monotonic()
+        result = player.play(source, timeout, cancelled)
+        started_at = player.started_at
+        if self._started_at is None and started_at is not None and started_at >= called:
+            self._started_at = started_at
+        return result
+
+    def _play_pcm(self, clip: PcmClip, sound_paths: Tuple[Path, ...], timeout: float,
+                  cancelled: Callable[[], bool]) -> bool:
+        """Play a clip straight to ALSA, replaying its sounds through mpg123 if ALSA fails"""
+        deadline = time.monotonic() + timeout
+        errors = self._pcm_player.errors
+        if self._play_on(self._pcm_player, clip, timeout, cancelled):
+            return True
+        if self._pcm_player.errors == errors:
+            return False  # Timed out, mpg123 would not do better
+        self.logger.info("Falling back to mpg123")
+        return self._play_mpg123(sound_paths, deadline, cancelled)
+
+    def _play_mpg123(self, sound_paths: Tuple[Path, ...], deadline: float,
+                     cancelled: Callable[[], bool]) -> bool:
+        for sound_path in sound_paths:
+            remaining = deadline - time.monotonic()
+            if cancelled() or remaining <= 0:
+                break
+            if not self._play_on(self._player, sound_path, remaining, cancelled):
                 return False
+        return True
 
-        except subprocess.TimeoutExpired:
-            self.logger.error("Volume set timeout")
-            return False
-        except Exception as e:
-            self.logger.error(f"Volume set error: {e}")
-            return False
+    def _play_one(self, sound_path: Path, timeout: float, cancelled: Callable[[], bool]) -> bool:
+        """Play a sound from the PCM cache if possible, otherwise through mpg123"""
+        if self._pcm_player is not None:
+            clip = self._pcm_cache.get(sound_path)
+            if clip is not None and clip.sampwidth == 2:
+                return self._play_pcm(clip, (sound_path,), timeout, cancelled)
+        return self._play_on(self._player, sound_path, timeout, cancelled)
+
+    def _play(self, sound_paths: Tuple[Path, ...], timeout: float,
+              cancelled: Callable[[], bool]) -> bool:
+        """Play sounds back to back, as one joined clip when they share a PCM format.
+
+        cancelled() turns true once the sounds are preempted, possibly before they start"""
+        if len(sound_paths) == 1:
+            return self._play_one(sound_paths[0], timeout, cancelled)
+
+        if self._pcm_player is not None:
+            clips = [self._pcm_cache.get(path) for path in sound_paths]
+            first = clips[0]
+            if all(clip is not None and clip.sampwidth == 2 and clip.channels == first.channels
+                   and clip.rate == first.rate for clip in clips):
+                joined = PcmClip(first.path, first.mtime, first.channels, first.rate, 2,
+                                 b''.join(clip.frames for clip in clips))
+                return self._play_pcm(joined, sound_paths, timeout, cancelled)
+
+        deadline = time.monotonic() + timeout
+        for sound_path in sound_paths:
+            remaining = deadline - time.monotonic()
+            if cancelled() or remaining <= 0:
+                break
+            if not self._play_one(sound_path, remaining, cancelled):
+                return False
+        return True
+
+    def _play_timeout(self, sound_paths: Tuple[Path, ...]) -> float:
+        """Seconds sounds may play before they are stopped, from their durations when known"""
+        total = 0.
+        for sound_path in sound_paths:
+            entry = self._manifest.find(sound_path.stem)
+            if entry is None or entry.duration is None:
+                return 30. * len(sound_paths)
+            total += entry.duration
+        return total + 5.
+
+    def get_status(self, eventtime=None) -> Dict[str, Any]:
+        if not self.mpg123_path or not self.amixer_path:
+            return {'available': False}
+        scheduler = self._scheduler
+        player = self._player.get_status()
+        player['backend'] = 'pcm' if self._pcm_player is not None else 'mpg123'
+        player['pcm_busy'] = self._pcm_player is not None and self._pcm_player.busy
+        player['pcm_errors'] = self._pcm_player.errors if self._pcm_player is not None else 0
+        timeouts = self._player.timeouts
+        if self._pcm_player is not None:
+            timeouts += self._pcm_player.timeouts
+        status = scheduler.get_status()
+        status.update({
+            'available': True,
+            'player': player,
+            'volume': self._mixer.target,
+            'stream_active': self._stream_active,
+            'plays': scheduler.plays,
+            'merged': scheduler.merged,
+            'drops': scheduler.drops,
+            'preemptions': scheduler.preemptions,
+            'failures': scheduler.failures,
+            'timeouts': timeouts,
+            'start_latency': self.start_latency.get_status(),
+            'decode_time': self._pcm_cache.decode_times.get_status(),
+            'pcm_cache': self._pcm_cache.get_status(),
+            'sound_count': len(self._manifest),
+        })
+        return status
+
+    def _stop_playback(self):
+        self._player.stop()
+        if self._pcm_player is not None:
+            self._pcm_player.stop()
+
+    def _handle_disconnect(self):
+        self._scheduler.close()
+        self._player.close()
+        self._mixer.close()
+        if self._stream_active:
+            self._stream_active = False
+            self._stream_executor.submit(self._stop_stream)
+        self._stream_executor.shutdown(wait=False)
 
     def _setup_logger(self):
         """Configure dedicated logger for sound system"""
@@ -153,79 +948,24 @@ class SoundSystem:
             self.logger.error(f"Error finding amixer: {e}")
             return None
 
-    def _verify_sound_file(self, path: Path) -> bool:
-        """Verify if file exists and is an MP3 file"""
-        try:
-            if not path.is_file():
-                return False
-            
-            # Check file extension
-            return path.suffix.lower() == '.mp3'
-            
-        except Exception as e:
-            self.logger.error(f"Error verifying {path}: {e}")
-            return False
-
     def _find_sound_file(self, sound_name: str) -> Optional[Path]:
         """Find sound file by name, with or without .mp3 extension"""
-        sound_path = self.sound_dir / sound_name
-
-        # Try exact name first
-        if self._verify_sound_file(sound_path):
-            return sound_path
-
-        # Try with .mp3 extension
-        mp3_path = sound_path.with_suffix('.mp3')
-        if self._verify_sound_file(mp3_path):
-            return mp3_path
-
-        return None
-
-    def _play_sound_thread(self, sound_path: Path):
-        """Handle sound playback in a separate thread"""
-        try:
-            # Set flag before starting playback
-            self._sound_playing = True
-            
-            # Use mpg123 with quiet output (-q) and no fancy terminal output (-C)
-            process = subprocess.Popen(
-                [self.mpg123_path, '-q', '-C', str(sound_path)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-
-            # Wait for the process to complete
-            stdout, stderr = process.communicate(timeout=30)  # 30 second timeout
-            if process.returncode != 0:
-                self.logger.error(
-                    f"Play failed (code {process.returncode}): {stderr.decode()}")
-            else:
-                self.logger.debug("Play completed successfully")
-
-        except subprocess.TimeoutExpired:
-            self.logger.error("Play timeout - killing process")
-            process.kill()
-            process.communicate()  # Clean up
-        except Exception as e:
-            self.logger.error(f"Play thread error: {e}")
-        finally:
-            # Clear flag after playback is complete or on error
-            self._sound_playing = False
+        entry = self._manifest.find(sound_name)
+        if entry is None:
+            # Pick up sounds added since the last scan for the next lookup,
+            # scanning here would block the reactor
+            self._manifest.refresh_in_background()
+            return None
+        return entry.path
 
     def cmd_PLAY_SOUND(self, gcmd):
         """Handle PLAY_SOUND command"""
         if not self.mpg123_path:
             raise gcmd.error("mpg123 not available")
 
-        # Check if NOW flag is set
+        # NOW plays the sound right away, stopping the current one
         force_now = gcmd.get_int('NOW', 0)
 
-        # Strict check for ongoing playback, unless NOW is set
-        if self._sound_playing and not force_now:
-            self.logger.info("Sound already playing, ignoring new request")
-            gcmd.respond_info("Sound already playing, request ignored")
-            return
-
         sound_name = gcmd.get('SOUND')
         if not sound_name:
             raise gcmd.error("Missing SOUND parameter")
@@ -234,30 +974,47 @@ class SoundSystem:
         if not sound_path:
             raise gcmd.error(f"Sound file not found: {sound_name}")
 
-        # If NOW is set and there's a sound playing, kill existing playback
-        if force_now and self._sound_playing:
-            self.logger.info("Force playing new sound, stopping current playback")
-            try:
-                for proc in psutil.process_iter(['pid', 'name']):
-                    if proc.info['name'] == 'mpg123':
-                        os.kill(proc.info['pid'], signal.SIGTERM)
-                        self.logger.info(f"Killed existing mpg123 process: {proc.info['pid']}")
-                self._sound_playing = False
-            except Exception as e:
-                self.logger.error(f"Error killing existing sound: {e}")
+        self._submit(gcmd, (sound_path,), bool(force_now))
 
-        # Start playback in a separate thread
-        def start_playback(eventtime):
-            # Double-check the flag right before starting the thread, unless NOW is set
-            if not self._sound_playing or force_now:
-                Thread(target=self._play_sound_thread,
-                      args=(sound_path,),
-                      daemon=True).start()
-                gcmd.respond_info(f"Playing sound: {sound_path.name}")
-            return False  # Don't reschedule
+    def cmd_PLAY_SEQUENCE(self, gcmd):
+        """Handle PLAY_SEQUENCE command, the sounds are queued and played as one"""
+        if not self.mpg123_path:
+            raise gcmd.error("mpg123 not available")
 
-        reactor = self.printer.get_reactor()
-        reactor.register_callback(start_playback)
+        force_now = gcmd.get_int('NOW', 0)
+
+        sound_names = [name.strip() for name in gcmd.get('SOUNDS').split(',') if name.strip()]
+        if not sound_names:
+            raise gcmd.error("Missing SOUNDS parameter")
+
+        sound_paths = []
+        for sound_name in sound_names:
+            sound_path = self._find_sound_file(sound_name)
+            if not sound_path:
+                raise gcmd.error(f"Sound file not found: {sound_name}")
+            sound_paths.append(sound_path)
+
+        self._submit(gcmd, tuple(sound_paths), bool(force_now))
+
+    def _submit(self, gcmd, sound_paths: Tuple[Path, ...], urgent: bool):
+        """Queue sounds with the PRIORITY of gcmd, or the highest default of the sounds"""
+        level = gcmd.get('PRIORITY', None)
+        if level is None:
+            priority = max(self.sound_priorities.get(path.stem, SoundScheduler.PRIORITIES['normal'])
+                           for path in sound_paths)
+        elif level.lower() in SoundScheduler.PRIORITIES:
+            priority = SoundScheduler.PRIORITIES[level.lower()]
+        else:
+            raise gcmd.error(f"Invalid PRIORITY: {level} (low, normal or high)")
+
+        names = ', '.join(path.name for path in sound_paths)
+        result = self._scheduler.submit(sound_paths, priority, urgent=urgent)
+        if result == 'queued':
+            gcmd.respond_info(f"Playing sound: {names}")
+        elif result == 'merged':
+            self.logger.debug(f"Sound already queued: {names}")
+        else:
+            gcmd.respond_info(f"Sound queue full, request ignored: {names}")
 
     def cmd_SOUND_LIST(self, gcmd):
         """List available sound files"""
@@ -267,37 +1024,28 @@ class SoundSystem:
 
         msg = [f"Sound directory: {self.sound_dir}\n", "Available sounds:"]
 
-        try:
-            for sound_file in sorted(self.sound_dir.glob("*.mp3")):
-                status = "✓" if self._verify_sound_file(sound_file) else "✗"
-                msg.append(f"{status} {sound_file.name}")
-        except Exception as e:
-            self.logger.error(f"Error listing sounds: {e}")
-            msg.append(f"Error: {e}")
+        for entry in sorted(self._manifest.entries(), key=lambda e: e.name):
+            duration = f"{entry.duration:.1f}s" if entry.duration is not None else "unknown length"
+            msg.append(f"{entry.path.name} ({duration})")
 
         gcmd.respond_info("\n".join(msg))
+        # Sounds added or changed since are listed next time
+        self._manifest.refresh_in_background()
+
+    def _step_volume(self, gcmd, delta: int):
+        volume = self._mixer.step(delta)
+        if volume is None:
+            gcmd.respond_info("Volume change queued")
+        else:
+            gcmd.respond_info(f"Volume set to {volume}%")
 
     def cmd_VOLUME_UP(self, gcmd):
         """Increase PCM volume"""
-        if self._current_volume is None:
-            self._init_volume_state()
-
-        new_volume = self._current_volume + self.volume_step
-        if self._set_volume(new_volume):
-            gcmd.respond_info(f"Volume set to {self._current_volume}%")
-        else:
-            raise gcmd.error("Volume adjustment failed")
+        self._step_volume(gcmd, self.volume_step)
 
     def cmd_VOLUME_DOWN(self, gcmd):
         """Decrease PCM volume"""
-        if self._current_volume is None:
-            self._init_volume_state()
-
-        new_volume = self._current_volume - self.volume_step
-        if self._set_volume(new_volume):
-            gcmd.respond_info(f"Volume set to {self._current_volume}%")
-        else:
-            raise gcmd.error("Volume adjustment failed")
+        self._step_volume(gcmd, -self.volume_step)
 
     def _get_mpv_path(self):
         """Find mpv executable path"""
@@ -308,34 +1056,33 @@ class SoundSystem:
             self.logger.error(f"Error finding mpv: {e}")
             return None
 
-    def _kill_existing_stream(self):
-        """Kill any existing mpv processes"""
+    def _stop_stream(self):
+        """Stop the running stream, runs on the stream thread"""
+        process, self._stream_process = self._stream_process, None
+        if process is None:
+            return
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'] == 'mpv':
-                    os.kill(proc.info['pid'], signal.SIGTERM)
-                    self.logger.info(f"Killed existing mpv process: {proc.info['pid']}")
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            self.logger.info("Stopped radio stream")
         except Exception as e:
-            self.logger.error(f"Error killing existing stream: {e}")
+            self.logger.error(f"Error stopping stream: {e}")
 
-    def _start_stream_thread(self, url):
-        """Handle stream playback in a separate thread"""
+    def _start_stream(self, url):
+        """Start streaming url, runs on the stream thread"""
+        # Kill any existing stream first
+        self._stop_stream()
         try:
-            # Kill any existing stream first
-            if self._stream_process:
-                self._stream_process.terminate()
-                self._stream_process.wait()
-            
-            self._kill_existing_stream()  # Cleanup any orphaned processes
-            
-            # Start new stream
             self._stream_process = subprocess.Popen(
                 [self.mpv_path, url, '--no-video', '--no-terminal'],
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL
             )
             self.logger.info(f"Started streaming: {url}")
-            
         except Exception as e:
             self.logger.error(f"Stream thread error: {e}")
             self._stream_process = None
@@ -348,18 +1095,12 @@ class SoundSystem:
         current_time = self.printer.get_reactor().monotonic()
 
         # If stream is running, stop it
-        if self._stream_process:
-            try:
-                self._stream_process.terminate()
-                self._stream_process.wait()
-                self._stream_process = None
-                self._kill_existing_stream()  # Cleanup any orphaned processes
-                self.last_stream_stop_time = current_time
-                gcmd.respond_info("Stopped radio stream")
-                return
-            except Exception as e:
-                self.logger.error(f"Error stopping stream: {e}")
-                self._stream_process = None
+        if self._stream_active:
+            self._stream_active = False
+            self.last_stream_stop_time = current_time
+            self._stream_executor.submit(self._stop_stream)
+            gcmd.respond_info("Stopped radio stream")
+            return
 
         # Check if we should move to next stream or reset to current
         if (self.last_stream_stop_time is not None and 
@@ -372,17 +1113,11 @@ class SoundSystem:
 
         # Get current URL
         url = self.stream_urls[self.current_stream_index]
-        
-        def start_stream(eventtime):
-            Thread(target=self._start_stream_thread,
-                  args=(url,),
-                  daemon=True).start()
-            return False  # Don't reschedule
-
-        reactor = self.printer.get_reactor()
-        reactor.register_callback(start_stream)
+
+        self._stream_active = True
+        self._stream_executor.submit(self._start_stream, url)
         gcmd.respond_info(f"Starting radio stream ({self.current_stream_index + 1}/{len(self.stream_urls)}): {url}")
 
 
 def load_config(config):
-    return SoundSystem(config)
\ No newline at end of file
+    return SoundSystem(config)
@@ -0,0 +1,130 @@
+"""Tests for the sound manifest and its MP3 header parser.
+
+Run from the repository root:
+    python3 -m unittest discover -s lister_sound_system/tests
+"""
+import importlib.util
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+MANIFEST_PATH = Path(__file__).resolve().parent.parent / "extras" / "sound_manifest.py"
+spec = importlib.util.spec_from_file_location("sound_manifest", MANIFEST_PATH)
+sound_manifest = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sound_manifest)
+
+logger = logging.getLogger("test_sound_manifest")
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+
+# Frame headers: MPEG-1 layer III 128 kbps 44.1 kHz stereo, MPEG-2 layer III 64 kbps 22.05 kHz
+MPEG1_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+MPEG2_HEADER = bytes([0xFF, 0xF3, 0x80, 0x00])
+
+
+def id3_tag(size: int) -> bytes:
+    """ID3v2 header with a syncsafe size, followed by that much padding"""
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b'ID3\x03\x00\x00' + syncsafe + bytes(size)
+
+
+def xing_frame(frames: int) -> bytes:
+    """First MPEG-1 stereo frame carrying a Xing header with a frame count"""
+    side_info = bytes(32)
+    return MPEG1_HEADER + side_info + b'Xing' + (1).to_bytes(4, 'big') + frames.to_bytes(4, 'big')
+
+
+class Mp3InfoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def info(self, data: bytes):
+        path = Path(self.tmp.name) / "sound.mp3"
+        path.write_bytes(data)
+        return sound_manifest.read_mp3_info(path, len(data))
+
+    def test_constant_bitrate(self):
+        data = MPEG1_HEADER + bytes(16000 - 4)
+        duration, rate = self.info(data)
+        self.assertEqual(rate, 44100)
+        self.assertAlmostEqual(duration, 16000 * 8 / 128000.)
+
+    def test_id3_tag_is_skipped(self):
+        tag = id3_tag(1000)
+        data = tag + MPEG1_HEADER + bytes(16000)
+        duration, rate = self.info(data)
+        self.assertEqual(rate, 44100)
+        self.assertAlmostEqual(duration, (len(data) - len(tag)) * 8 / 128000.)
+
+    def test_xing_frame_count(self):
+        data = xing_frame(100) + bytes(4000)
+        duration, rate = self.info(data)
+        self.assertAlmostEqual(duration, 100 * 1152 / 44100.)
+
+    def test_mpeg2_layer3(self):
+        data = MPEG2_HEADER + bytes(8000 - 4)
+        duration, rate = self.info(data)
+        self.assertEqual(rate, 22050)
+        self.assertAlmostEqual(duration, 8000 * 8 / 64000.)
+
+    def test_invalid_headers_are_skipped(self):
+        # Sync bits followed by a reserved bitrate index
+        data = bytes([0xFF, 0xFB, 0xF0, 0x00]) + MPEG1_HEADER + bytes(1000)
+        duration, rate = self.info(data)
+        self.assertAlmostEqual(duration, (len(data) - 4) * 8 / 128000.)
+
+    def test_no_frame(self):
+        with self.assertRaises(ValueError):
+            self.info(b'not an mp3 file' * 10)
+
+
+class SoundManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.sound_dir = Path(tmp.name) / "sounds"
+        self.sound_dir.mkdir()
+        self.cache_path = Path(tmp.name) / "cache" / "manifest.json"
+        (self.sound_dir / "chime.mp3").write_bytes(MPEG1_HEADER + bytes(16000 - 4))
+        (self.sound_dir / "notes.txt").write_text("not a sound")
+
+    def manifest(self):
+        return sound_manifest.SoundManifest(self.sound_dir, self.cache_path, logger)
+
+    def test_refresh_indexes_mp3_files(self):
+        manifest = self.manifest()
+        self.assertTrue(manifest.refresh())
+        self.assertEqual(len(manifest), 1)
+        entry = manifest.find("chime.mp3")
+        self.assertIs(entry, manifest.find("chime"))
+        self.assertEqual(entry.duration, 1.0)
+        self.assertEqual(entry.sample_rate, 44100)
+        self.assertTrue(self.cache_path.exists())
+
+    def test_unchanged_files_come_from_the_cache(self):
+        self.manifest().refresh()
+        manifest = self.manifest()
+        manifest.load()
+        self.assertIsNotNone(manifest.find("chime"))
+        self.assertFalse(manifest.refresh())
+
+    def test_changed_and_new_files_are_probed(self):
+        manifest = self.manifest()
+        manifest.refresh()
+        (self.sound_dir / "alert.mp3").write_bytes(MPEG2_HEADER + bytes(8000 - 4))
+        self.assertTrue(manifest.refresh())
+        self.assertEqual(sorted(entry.name for entry in manifest.entries()), ["alert", "chime"])
+
+    def test_background_refresh_swaps_the_entries_in(self):
+        manifest = self.manifest()
+        manifest.refresh_in_background()
+        manifest._refresh_thread.join(5.)
+        self.assertIsNotNone(manifest.find("chime"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""Tests for the sound scheduler: merging, dropping and preemption.
+
+Run from the repository root:
+    python3 -m unittest discover -s lister_sound_system/tests
+"""
+import importlib
+import logging
+import queue
+import sys
+import threading
+import time
+import types
+import unittest
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+EXTRAS_DIR = Path(__file__).resolve().parent.parent / "extras"
+PACKAGE = "lister_sound_system_extras"
+
+
+def load_extras_module(name: str):
+    """Import a module from extras/ as part of a package, for its relative imports"""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(EXTRAS_DIR)]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{name}")
+
+
+sound_system = load_extras_module("sound_system")
+SoundScheduler = sound_system.SoundScheduler
+LOW, NORMAL, HIGH = (SoundScheduler.PRIORITIES[level] for level in ('low', 'normal', 'high'))
+
+
+def sound(name: str) -> Tuple[Path, ...]:
+    return (Path(f"{name}.mp3"),)
+
+
+class SchedulerTest(unittest.TestCase):
+    """Plays through a stand-in player that decodes, then plays until stopped.
+
+    The first play of a sound in `long` lasts two seconds, everything else 50 ms"""
+
+    max_queue = 3
+    feedback_max_delay = 5.
+
+    def setUp(self):
+        self.long = {'a.mp3'}
+        # Set to hold sounds in their decode step until it is set
+        self.decode: Optional[threading.Event] = None
+        self.stopped = threading.Event()
+        self.started: "queue.Queue[str]" = queue.Queue()
+        self.results: List[Tuple[str, str]] = []
+        logger = logging.getLogger("test_sound_scheduler")
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+        self.scheduler = SoundScheduler(self._play, self.stopped.set, self.max_queue,
+                                        self.feedback_max_delay, logger)
+
+    def tearDown(self):
+        self.scheduler.close()
+        if self.decode is not None:
+            self.decode.set()
+        self.stopped.set()
+
+    def _play(self, item) -> bool:
+        self.started.put(item.name)
+        if self.decode is not None:
+            self.decode.wait(5.)
+        self.stopped.clear()
+        if self.scheduler.is_stopped(item):
+            self.results.append((item.name, 'skipped'))
+            return True
+        hold = 2. if item.name in self.long else 0.05
+        self.long.discard(item.name)
+        stopped = self.stopped.wait(hold)
+        self.results.append((item.name, 'stopped' if stopped else 'done'))
+        return True
+
+    def wait_started(self, name: str):
+        self.assertEqual(self.started.get(timeout=2.), f"{name}.mp3")
+
+    def wait_results(self, count: int) -> List[Tuple[str, str]]:
+        deadline = time.monotonic() + 5.
+        while len(self.results) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return [(name[:-len('.mp3')], result) for name, result in self.results]
+
+
+class PreemptionTest(SchedulerTest):
+
+    def test_higher_priority_stops_the_current_sound(self):
+        self.scheduler.submit(sound('a'), NORMAL)
+        self.wait_started('a')
+        self.assertEqual(self.scheduler.submit(sound('b'), HIGH), 'queued')
+        self.assertEqual(self.wait_results(2), [('a', 'stopped'), ('b', 'done')])
+        self.assertEqual(self.scheduler.preemptions, 1)
+
+    def test_same_priority_waits_its_turn(self):
+        self.long = set()
+        self.scheduler.submit(sound('a'), NORMAL)
+        self.wait_started('a')
+        self.scheduler.submit(sound('b'), NORMAL)
+        self.assertEqual(self.wait_results(2), [('a', 'done'), ('b', 'done')])
+        self.assertEqual(self.scheduler.preemptions, 0)
+
+    def test_urgent_sound_stops_the_same_sound(self):
+        self.scheduler.submit(sound('a'), NORMAL)
+        self.wait_started('a')
+        self.assertEqual(self.scheduler.submit(sound('a'), NORMAL, urgent=True), 'queued')
+        self.assertEqual(self.wait_results(2), [('a', 'stopped'), ('a', 'done')])
+
+    def test_merged_priority_upgrade_preempts(self):
+        self.scheduler.submit(sound('a'), NORMAL)
+        self.wait_started('a')
+        self.assertEqual(self.scheduler.submit(sound('b'), LOW), 'queued')
+        self.assertEqual(self.scheduler.submit(sound('b'), HIGH), 'merged')
+        self.assertEqual(self.wait_results(2), [('a', 'stopped'), ('b', 'done')])
+        self.assertEqual(self.scheduler.preemptions, 1)
+
+    def test_preemption_during_decode_skips_the_sound(self):
+        # The stop arrives before the player has started, it must not be lost
+        self.decode = threading.Event()
+        self.scheduler.submit(sound('a'), NORMAL)
+        self.wait_started('a')
+        self.scheduler.submit(sound('b'), HIGH)
+        self.decode.set()
+        self.assertEqual(self.wait_results(2), [('a', 'skipped'), ('b', 'done')])
+
+
+class QueueTest(SchedulerTest):
+
+    def test_identical_sound_is_merged(self):
+        self.scheduler.submit(sound('a'), NORMAL)
+        self.wait_started('a')
+        self.assertEqual(self.scheduler.submit(sound('a'), NORMAL), 'merged')
+        self.assertEqual(self.scheduler.submit(sound('b'), NORMAL), 'queued')
+        self.assertEqual(self.scheduler.submit(sound('b'), NORMAL), 'merged')
+        self.assertEqual(self.scheduler.merged, 2)
+
+    def test_full_queue_drops_the_least_important(self):
+        self.scheduler.submit(sound('a'), NORMAL)
+        self.wait_started('a')
+        self.scheduler.submit(sound('low'), LOW)
+        self.scheduler.submit(sound('b'), NORMAL)
+        self.scheduler.submit(sound('c'), NORMAL)
+        self.assertEqual(self.scheduler.submit(sound('d'), NORMAL), 'queued')
+        self.assertEqual(self.scheduler.get_status()['queued'], ['b.mp3', 'c.mp3', 'd.mp3'])
+        self.assertEqual(self.scheduler.submit(sound('up'), LOW), 'dropped')
+        self.assertEqual(self.scheduler.drops, 2)
+
+
+class StaleFeedbackTest(SchedulerTest):
+
+    feedback_max_delay = 0.05
+
+    def test_late_low_priority_feedback_is_skipped(self):
+        self.long = set()
+        self.scheduler.submit(sound('a'), NORMAL)
+        self.wait_started('a')
+        self.scheduler.submit(sound('up'), LOW)
+        self.scheduler.submit(sound('b'), NORMAL)
+        self.assertEqual(self.wait_results(2), [('a', 'done'), ('b', 'done')])
+        self.assertEqual(self.scheduler.drops, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()